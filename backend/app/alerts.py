@@ -0,0 +1,162 @@
+import time
+import uuid
+import logging
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+from .config import Config
+from .database import get_ingest_pool
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING_ALERTS = 10000
+ALERT_TYPES = ("speeding", "overheating", "fuel_drop", "low_fuel", "offline")
+
+INSERT_ALERT_SQL = """
+    INSERT INTO alerts (id, time, vehicle_id, type, severity, message, value)
+    VALUES ($1, $2, $3, $4, $5, $6, $7)
+"""
+
+class VehicleWindow:
+    """
+    Per-vehicle rolling state. Fuel maxima over the drop window are kept in a
+    monotonic deque, so each update and query is amortized O(1).
+    """
+
+    __slots__ = ("fuel_max",)
+
+    def __init__(self):
+        self.fuel_max: Deque[Tuple[float, float]] = deque()
+
+    def fuel_drop(self, ts: float, fuel: float, window: float) -> float:
+        while self.fuel_max and self.fuel_max[-1][1] <= fuel:
+            self.fuel_max.pop()
+        self.fuel_max.append((ts, fuel))
+        while self.fuel_max[0][0] < ts - window:
+            self.fuel_max.popleft()
+        return self.fuel_max[0][1] - fuel
+
+class AlertEngine:
+    """
+    Streaming rules evaluated per telemetry message without touching the
+    database. Alerts are deduplicated while their condition persists,
+    rate-limited per (vehicle, type) and written out in batches.
+    """
+
+    def __init__(self):
+        self.windows: Dict[str, VehicleWindow] = {}
+        # (vehicle_id, type) -> alert, while the condition holds
+        self.active: Dict[Tuple[str, str], dict] = {}
+        self.last_raised: Dict[Tuple[str, str], float] = {}
+        # vehicle_id -> monotonic receive time, oldest first
+        self.last_seen: "OrderedDict[str, float]" = OrderedDict()
+        self.pending: List[dict] = []
+        self.suppressed = 0
+
+    def active_count(self) -> int:
+        return len(self.active)
+
+    def active_alerts(self) -> List[dict]:
+        return sorted(self.active.values(), key=lambda a: a['timestamp'].timestamp(), reverse=True)
+
+    def _raise(self, vehicle_id: str, alert_type: str, severity: str, message: str,
+               value: Optional[float], ts: datetime, now: float):
+        key = (vehicle_id, alert_type)
+        if key in self.active:
+            return
+        last = self.last_raised.get(key)
+        if last is not None and now - last < Config.ALERT_COOLDOWN:
+            self.suppressed += 1
+            return
+        alert = {
+            "id": str(uuid.uuid4()),
+            "vehicle_id": vehicle_id,
+            "type": alert_type,
+            "severity": severity,
+            "message": message,
+            "value": value,
+            "timestamp": ts,
+        }
+        self.active[key] = alert
+        self.last_raised[key] = now
+        self.pending.append(alert)
+
+    def _check(self, condition: bool, vehicle_id: str, alert_type: str, severity: str,
+               message: str, value: Optional[float], ts: datetime, now: float):
+        if condition:
+            self._raise(vehicle_id, alert_type, severity, message, value, ts, now)
+        else:
+            self.active.pop((vehicle_id, alert_type), None)
+
+    def process(self, payload: dict):
+        vehicle_id = payload['vehicle_id']
+        ts = payload['timestamp']
+        now = time.monotonic()
+
+        self.last_seen[vehicle_id] = now
+        self.last_seen.move_to_end(vehicle_id)
+        self.active.pop((vehicle_id, "offline"), None)
+
+        speed = payload.get('speed')
+        if speed is not None:
+            self._check(speed > Config.ALERT_SPEED_LIMIT, vehicle_id, "speeding", "warning",
+                        f"Speed {speed:.0f} km/h exceeds {Config.ALERT_SPEED_LIMIT:.0f} km/h", speed, ts, now)
+
+        temp = payload.get('engine_temp')
+        if temp is not None:
+            self._check(temp >= Config.ALERT_ENGINE_TEMP_MAX, vehicle_id, "overheating", "critical",
+                        f"Engine temperature {temp:.1f}°C", temp, ts, now)
+
+        fuel = payload.get('fuel_level')
+        if fuel is not None:
+            window = self.windows.get(vehicle_id)
+            if window is None:
+                window = self.windows[vehicle_id] = VehicleWindow()
+            drop = window.fuel_drop(ts.timestamp(), fuel, Config.ALERT_FUEL_DROP_WINDOW)
+            self._check(drop >= Config.ALERT_FUEL_DROP_PCT, vehicle_id, "fuel_drop", "critical",
+                        f"Fuel dropped {drop:.1f}% within {Config.ALERT_FUEL_DROP_WINDOW:.0f}s", drop, ts, now)
+            self._check(fuel < Config.ALERT_LOW_FUEL, vehicle_id, "low_fuel", "warning",
+                        f"Fuel level {fuel:.1f}%", fuel, ts, now)
+
+    def sweep_offline(self):
+        """Raise offline alerts for vehicles silent longer than the TTL. Only expired entries are visited."""
+        now = time.monotonic()
+        cutoff = now - Config.VEHICLE_OFFLINE_AFTER
+        while self.last_seen:
+            vehicle_id, seen = next(iter(self.last_seen.items()))
+            if seen > cutoff:
+                break
+            self.last_seen.popitem(last=False)
+            self._raise(vehicle_id, "offline", "warning",
+                        f"No telemetry for {Config.VEHICLE_OFFLINE_AFTER:.0f}s", None, datetime.now(timezone.utc), now)
+
+    def forget(self, vehicle_id: str):
+        """Drop all state for a vehicle pruned from the live fleet, including its offline alert."""
+        self.windows.pop(vehicle_id, None)
+        self.last_seen.pop(vehicle_id, None)
+        for alert_type in ALERT_TYPES:
+            self.active.pop((vehicle_id, alert_type), None)
+            self.last_raised.pop((vehicle_id, alert_type), None)
+
+    async def run(self):
+        self.sweep_offline()
+        await self.flush()
+
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        records = [
+            (uuid.UUID(a['id']), a['timestamp'], a['vehicle_id'], a['type'], a['severity'], a['message'], a['value'])
+            for a in batch
+        ]
+        try:
+            pool = await get_ingest_pool()
+            async with pool.acquire() as conn:
+                await conn.executemany(INSERT_ALERT_SQL, records)
+        except Exception as e:
+            logger.error(f"Alert flush failed: {e}")
+            # Keep the newest alerts for retry if the database stays down
+            self.pending = (batch + self.pending)[-MAX_PENDING_ALERTS:]
+
+alert_engine = AlertEngine()
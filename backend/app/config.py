@@ -6,3 +6,57 @@ class Config:
     MQTT_PORT = int(os.getenv("MQTT_PORT", 1883))
     MQTT_TOPIC = "vehicles/+/telemetry"
     REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+    # Connection pools: ingest (MQTT writes) and query (API reads) are sized
+    # separately so heavy analytics cannot starve telemetry inserts.
+    DB_INGEST_POOL_MIN = int(os.getenv("DB_INGEST_POOL_MIN", 2))
+    DB_INGEST_POOL_MAX = int(os.getenv("DB_INGEST_POOL_MAX", 5))
+    DB_QUERY_POOL_MIN = int(os.getenv("DB_QUERY_POOL_MIN", 2))
+    DB_QUERY_POOL_MAX = int(os.getenv("DB_QUERY_POOL_MAX", 10))
+    DB_ACQUIRE_TIMEOUT = float(os.getenv("DB_ACQUIRE_TIMEOUT", 10.0))
+    DB_COMMAND_TIMEOUT = float(os.getenv("DB_COMMAND_TIMEOUT", 30.0))
+    # Recycle connections after this many queries / seconds of inactivity
+    DB_POOL_MAX_QUERIES = int(os.getenv("DB_POOL_MAX_QUERIES", 50000))
+    DB_POOL_MAX_INACTIVE_LIFETIME = float(os.getenv("DB_POOL_MAX_INACTIVE_LIFETIME", 300.0))
+    DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100))
+    DB_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_HEALTH_CHECK_INTERVAL", 30.0))
+
+    # Geofence analytics: how often in-memory counters are persisted
+    GEOFENCE_FLUSH_INTERVAL = float(os.getenv("GEOFENCE_FLUSH_INTERVAL", 30.0))
+
+    # Alert rules
+    ALERT_ENGINE_TEMP_MAX = float(os.getenv("ALERT_ENGINE_TEMP_MAX", 105.0))
+    ALERT_SPEED_LIMIT = float(os.getenv("ALERT_SPEED_LIMIT", 120.0))
+    ALERT_LOW_FUEL = float(os.getenv("ALERT_LOW_FUEL", 10.0))
+    ALERT_FUEL_DROP_PCT = float(os.getenv("ALERT_FUEL_DROP_PCT", 10.0))
+    ALERT_FUEL_DROP_WINDOW = float(os.getenv("ALERT_FUEL_DROP_WINDOW", 300.0))
+    # Minimum seconds between two alerts of the same type for the same vehicle
+    ALERT_COOLDOWN = float(os.getenv("ALERT_COOLDOWN", 300.0))
+    ALERT_FLUSH_INTERVAL = float(os.getenv("ALERT_FLUSH_INTERVAL", 5.0))
+
+    # Live vehicle state: silence before a vehicle is marked offline, and
+    # before it is dropped from Redis entirely
+    VEHICLE_OFFLINE_AFTER = float(os.getenv("VEHICLE_OFFLINE_AFTER", 120.0))
+    VEHICLE_TTL = int(os.getenv("VEHICLE_TTL", 3600))
+    OFFLINE_SWEEP_INTERVAL = float(os.getenv("OFFLINE_SWEEP_INTERVAL", 15.0))
+
+    # Write-ahead spool for telemetry that could not be written to the database
+    SPOOL_DIR = os.getenv("SPOOL_DIR", "spool")
+    SPOOL_SEGMENT_BYTES = int(os.getenv("SPOOL_SEGMENT_BYTES", 8 * 1024 * 1024))
+    SPOOL_WRITE_TIMEOUT = float(os.getenv("SPOOL_WRITE_TIMEOUT", 2.0))
+    SPOOL_REPLAY_INTERVAL = float(os.getenv("SPOOL_REPLAY_INTERVAL", 5.0))
+    SPOOL_REPLAY_BATCH = int(os.getenv("SPOOL_REPLAY_BATCH", 5000))
+    # Max rows per second replayed into the database after an outage
+    SPOOL_REPLAY_RATE = float(os.getenv("SPOOL_REPLAY_RATE", 20000))
+
+    # Ingest deduplication: recent timestamps remembered per vehicle
+    DEDUP_WINDOW = int(os.getenv("DEDUP_WINDOW", 32))
+
+    # Trip segmentation
+    TRIP_MIN_SPEED = float(os.getenv("TRIP_MIN_SPEED", 3.0))
+    # A trip ends after this long stationary, or at a telemetry gap longer than TRIP_MAX_GAP
+    TRIP_STOP_SECONDS = float(os.getenv("TRIP_STOP_SECONDS", 300.0))
+    TRIP_MAX_GAP = float(os.getenv("TRIP_MAX_GAP", 600.0))
+    TRIP_MIN_DISTANCE_KM = float(os.getenv("TRIP_MIN_DISTANCE_KM", 0.1))
+    TRIP_FLUSH_INTERVAL = float(os.getenv("TRIP_FLUSH_INTERVAL", 30.0))
+    TRIP_BACKFILL_MAX_HOURS = float(os.getenv("TRIP_BACKFILL_MAX_HOURS", 168.0))
@@ -1,25 +1,214 @@
-import asyncpg
+import time
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from .config import Config
 
 logger = logging.getLogger(__name__)
 db_pool = None
+ingest_pool = None
+
+# Bump whenever init_db's DDL changes; startup skips migrations when the
+# stored version matches.
+SCHEMA_VERSION = 8
+
+# Hot statements are kept as constant SQL text so asyncpg's per-connection
+# statement cache can reuse the prepared plan on every call.
+INSERT_TELEMETRY_SQL = """
+    INSERT INTO vehicle_telemetry (time, vehicle_id, latitude, longitude, speed, fuel_level, engine_temp, heading, status)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+"""
+
+class PoolMetrics:
+    def __init__(self):
+        self.acquisitions = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.health_failures = 0
+        self.last_health_check = None
+        self.healthy = True
+
+    def record_wait(self, wait: float):
+        self.acquisitions += 1
+        self.total_wait += wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+
+    def as_dict(self) -> dict:
+        avg = self.total_wait / self.acquisitions if self.acquisitions else 0.0
+        return {
+            "acquisitions": self.acquisitions,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(avg * 1000, 3),
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "health_failures": self.health_failures,
+            "last_health_check": self.last_health_check,
+            "healthy": self.healthy,
+        }
+
+class InstrumentedPool:
+    """Wraps an asyncpg pool to record how long callers wait for a connection."""
+
+    def __init__(self, name: str, pool):
+        self.name = name
+        self._pool = pool
+        self.metrics = PoolMetrics()
+
+    @asynccontextmanager
+    async def acquire(self):
+        start = time.perf_counter()
+        acquired = False
+        try:
+            async with self._pool.acquire(timeout=Config.DB_ACQUIRE_TIMEOUT) as conn:
+                acquired = True
+                self.metrics.record_wait(time.perf_counter() - start)
+                yield conn
+        except asyncio.TimeoutError:
+            if not acquired:
+                self.metrics.timeouts += 1
+            raise
+
+    async def check_health(self) -> bool:
+        """Ping the pool; on failure drop idle connections so they are re-opened."""
+        self.metrics.last_health_check = time.time()
+        try:
+            async with self.acquire() as conn:
+                await conn.fetchval("SELECT 1")
+            self.metrics.healthy = True
+        except Exception as e:
+            logger.warning(f"{self.name} pool health check failed: {e}")
+            self.metrics.health_failures += 1
+            self.metrics.healthy = False
+            try:
+                await self._pool.expire_connections()
+            except Exception:
+                pass
+        return self.metrics.healthy
+
+    def stats(self) -> dict:
+        stats = self.metrics.as_dict()
+        try:
+            stats["size"] = self._pool.get_size()
+            stats["idle"] = self._pool.get_idle_size()
+        except Exception:
+            pass
+        stats["min_size"], stats["max_size"] = _pool_bounds(self.name)
+        return stats
+
+    async def close(self):
+        await self._pool.close()
+
+    def __getattr__(self, item):
+        return getattr(self._pool, item)
+
+def _pool_bounds(name: str):
+    if name == "ingest":
+        return Config.DB_INGEST_POOL_MIN, Config.DB_INGEST_POOL_MAX
+    return Config.DB_QUERY_POOL_MIN, Config.DB_QUERY_POOL_MAX
+
+async def _create_pool(name: str) -> InstrumentedPool:
+    import asyncpg
+
+    min_size, max_size = _pool_bounds(name)
+    pool = await asyncpg.create_pool(
+        Config.DATABASE_URL,
+        min_size=min_size,
+        max_size=max_size,
+        max_queries=Config.DB_POOL_MAX_QUERIES,
+        max_inactive_connection_lifetime=Config.DB_POOL_MAX_INACTIVE_LIFETIME,
+        command_timeout=Config.DB_COMMAND_TIMEOUT,
+        statement_cache_size=Config.DB_STATEMENT_CACHE_SIZE,
+    )
+    logger.info(f"Created {name} DB pool (min={min_size}, max={max_size})")
+    return InstrumentedPool(name, pool)
+
+# One lock per pool, so concurrent first callers wait for the pool being
+# built instead of each creating (and leaking) their own
+_pool_locks = {"query": asyncio.Lock(), "ingest": asyncio.Lock()}
+
+async def _get_pool(name: str) -> InstrumentedPool:
+    global db_pool, ingest_pool
+    pool = ingest_pool if name == "ingest" else db_pool
+    if pool:
+        return pool
+    async with _pool_locks[name]:
+        pool = ingest_pool if name == "ingest" else db_pool
+        if not pool:
+            pool = await _create_pool(name)
+            if name == "ingest":
+                ingest_pool = pool
+            else:
+                db_pool = pool
+    return pool
 
 async def get_db_pool():
-    global db_pool
-    if not db_pool:
-        db_pool = await asyncpg.create_pool(Config.DATABASE_URL)
-    return db_pool
+    """Pool for API/analytics queries."""
+    return await _get_pool("query")
+
+async def get_ingest_pool():
+    """Pool reserved for telemetry ingest writes."""
+    return await _get_pool("ingest")
+
+async def open_db_pools():
+    """Create both pools up front, so the first telemetry writes do not race to build one."""
+    await asyncio.gather(get_db_pool(), get_ingest_pool())
 
 async def close_db_pool():
-    global db_pool
-    if db_pool:
-        await db_pool.close()
-        db_pool = None
+    global db_pool, ingest_pool
+    for pool in (db_pool, ingest_pool):
+        if pool:
+            await pool.close()
+    db_pool = None
+    ingest_pool = None
+
+async def check_pools_health():
+    for pool in (db_pool, ingest_pool):
+        if pool:
+            await pool.check_health()
+
+def ingest_healthy() -> bool:
+    return ingest_pool is None or ingest_pool.metrics.healthy
+
+def is_connection_error(exc: BaseException) -> bool:
+    """True for failures of the database or network, as opposed to a rejected row."""
+    import asyncpg
+
+    return isinstance(exc, (
+        asyncio.TimeoutError, OSError, asyncpg.InterfaceError,
+        asyncpg.PostgresConnectionError, asyncpg.CannotConnectNowError, asyncpg.TooManyConnectionsError,
+    ))
+
+def is_undefined_table(exc: BaseException) -> bool:
+    import asyncpg
+
+    return isinstance(exc, asyncpg.UndefinedTableError)
+
+def mark_ingest_unhealthy():
+    # Cleared again by the next successful health check
+    if ingest_pool:
+        ingest_pool.metrics.healthy = False
+
+def get_pool_stats() -> dict:
+    return {
+        name: pool.stats()
+        for name, pool in (("query", db_pool), ("ingest", ingest_pool))
+        if pool
+    }
+
+async def get_schema_version(conn):
+    try:
+        return await conn.fetchval("SELECT version FROM schema_meta")
+    except Exception:
+        return None
 
 async def init_db():
     pool = await get_db_pool()
     async with pool.acquire() as conn:
+        if await get_schema_version(conn) == SCHEMA_VERSION:
+            logger.info(f"Schema at version {SCHEMA_VERSION}, skipping migrations")
+            return
+
         # Create table with new schema
         await conn.execute("""
             CREATE TABLE IF NOT EXISTS vehicle_telemetry (
@@ -37,12 +226,68 @@ async def init_db():
             CREATE TABLE IF NOT EXISTS geofences (
                 id            UUID PRIMARY KEY DEFAULT gen_random_uuid(),
                 name          TEXT NOT NULL,
-                center_lat    DOUBLE PRECISION NOT NULL,
-                center_lng    DOUBLE PRECISION NOT NULL,
-                radius_meters DOUBLE PRECISION NOT NULL,
+                shape         TEXT NOT NULL DEFAULT 'circle',
+                center_lat    DOUBLE PRECISION,
+                center_lng    DOUBLE PRECISION,
+                radius_meters DOUBLE PRECISION,
+                coordinates   DOUBLE PRECISION[],
+                buffer_meters DOUBLE PRECISION,
+                min_lat       DOUBLE PRECISION,
+                min_lng       DOUBLE PRECISION,
+                max_lat       DOUBLE PRECISION,
+                max_lng       DOUBLE PRECISION,
                 color         TEXT DEFAULT '#3B82F6',
                 created_at    TIMESTAMPTZ DEFAULT NOW()
             );
+
+            CREATE TABLE IF NOT EXISTS geofence_rollups (
+                geofence_id    UUID             NOT NULL,
+                bucket         TIMESTAMPTZ      NOT NULL,
+                enters         INTEGER          NOT NULL DEFAULT 0,
+                exits          INTEGER          NOT NULL DEFAULT 0,
+                dwell_seconds  DOUBLE PRECISION NOT NULL DEFAULT 0,
+                max_dwell      DOUBLE PRECISION NOT NULL DEFAULT 0,
+                PRIMARY KEY (geofence_id, bucket)
+            );
+
+            CREATE TABLE IF NOT EXISTS geofence_visits (
+                geofence_id    UUID             NOT NULL,
+                vehicle_id     TEXT             NOT NULL,
+                entered_at     TIMESTAMPTZ      NOT NULL,
+                exited_at      TIMESTAMPTZ      NOT NULL,
+                dwell_seconds  DOUBLE PRECISION NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS geofence_visits_fence_idx ON geofence_visits (geofence_id, exited_at DESC);
+
+            CREATE TABLE IF NOT EXISTS alerts (
+                id          UUID PRIMARY KEY,
+                time        TIMESTAMPTZ NOT NULL,
+                vehicle_id  TEXT        NOT NULL,
+                type        TEXT        NOT NULL,
+                severity    TEXT        NOT NULL,
+                message     TEXT,
+                value       DOUBLE PRECISION
+            );
+            CREATE INDEX IF NOT EXISTS alerts_time_idx ON alerts (time DESC);
+            CREATE INDEX IF NOT EXISTS alerts_vehicle_idx ON alerts (vehicle_id, time DESC);
+
+            CREATE TABLE IF NOT EXISTS trips (
+                id               UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+                vehicle_id       TEXT             NOT NULL,
+                start_time       TIMESTAMPTZ      NOT NULL,
+                end_time         TIMESTAMPTZ      NOT NULL,
+                start_lat        DOUBLE PRECISION NOT NULL,
+                start_lng        DOUBLE PRECISION NOT NULL,
+                end_lat          DOUBLE PRECISION NOT NULL,
+                end_lng          DOUBLE PRECISION NOT NULL,
+                distance_km      DOUBLE PRECISION NOT NULL,
+                duration_seconds DOUBLE PRECISION NOT NULL,
+                idle_seconds     DOUBLE PRECISION NOT NULL,
+                fuel_used        DOUBLE PRECISION NOT NULL,
+                max_speed        DOUBLE PRECISION NOT NULL,
+                avg_speed        DOUBLE PRECISION NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS trips_vehicle_idx ON trips (vehicle_id, start_time DESC);
         """)
         
         # Migration: Add columns if they don't exist (for existing DBs)
@@ -57,6 +302,36 @@ async def init_db():
             except Exception as e:
                 logger.warning(f"Could not add column {col}: {e}")
 
+        # Migration: polygon/corridor geofences with precomputed bounding boxes
+        for col, dtype in [
+            ("shape", "TEXT NOT NULL DEFAULT 'circle'"),
+            ("coordinates", "DOUBLE PRECISION[]"),
+            ("buffer_meters", "DOUBLE PRECISION"),
+            ("min_lat", "DOUBLE PRECISION"),
+            ("min_lng", "DOUBLE PRECISION"),
+            ("max_lat", "DOUBLE PRECISION"),
+            ("max_lng", "DOUBLE PRECISION")
+        ]:
+            try:
+                await conn.execute(f"ALTER TABLE geofences ADD COLUMN IF NOT EXISTS {col} {dtype};")
+            except Exception as e:
+                logger.warning(f"Could not add geofence column {col}: {e}")
+        for col in ("center_lat", "center_lng", "radius_meters"):
+            try:
+                await conn.execute(f"ALTER TABLE geofences ALTER COLUMN {col} DROP NOT NULL;")
+            except Exception as e:
+                logger.warning(f"Could not relax geofence column {col}: {e}")
+        # Backfill boxes for circles created before the columns existed; same
+        # formula as geometry.circle_bounding_box
+        await conn.execute("""
+            UPDATE geofences SET
+                min_lat = center_lat - radius_meters / 111320.0,
+                max_lat = center_lat + radius_meters / 111320.0,
+                min_lng = center_lng - radius_meters / (111320.0 * GREATEST(cos(radians(abs(center_lat))), 1e-6)),
+                max_lng = center_lng + radius_meters / (111320.0 * GREATEST(cos(radians(abs(center_lat))), 1e-6))
+            WHERE min_lat IS NULL AND center_lat IS NOT NULL;
+        """)
+
         # Convert to hypertable
         try:
             await conn.execute("SELECT create_hypertable('vehicle_telemetry', 'time', if_not_exists => TRUE);")
@@ -64,11 +339,20 @@ async def init_db():
         except Exception as e:
             logger.warning(f"Hypertable creation skipped: {e}")
 
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_meta (
+                id      BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+                version INTEGER NOT NULL
+            );
+        """)
+        await conn.execute("""
+            INSERT INTO schema_meta (id, version) VALUES (TRUE, $1)
+            ON CONFLICT (id) DO UPDATE SET version = EXCLUDED.version
+        """, SCHEMA_VERSION)
+        logger.info(f"Schema migrated to version {SCHEMA_VERSION}")
+
 async def save_telemetry(data: dict):
-    pool = await get_db_pool()
+    pool = await get_ingest_pool()
     async with pool.acquire() as conn:
-        await conn.execute("""
-            INSERT INTO vehicle_telemetry (time, vehicle_id, latitude, longitude, speed, fuel_level, engine_temp, heading, status)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-        """, data['timestamp'], data['vehicle_id'], data['latitude'], data['longitude'], data['speed'],
+        await conn.execute(INSERT_TELEMETRY_SQL, data['timestamp'], data['vehicle_id'], data['latitude'], data['longitude'], data['speed'],
            data.get('fuel_level'), data.get('engine_temp'), data.get('heading'), data.get('status'))
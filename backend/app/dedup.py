@@ -0,0 +1,75 @@
+from array import array
+from datetime import datetime
+from typing import Dict
+from .config import Config
+
+FRESH = "fresh"
+LATE = "late"
+DUPLICATE = "duplicate"
+
+class RecentFixes:
+    """
+    Per-vehicle state: the newest timestamp and a fixed-size ring buffer of
+    recent timestamps (NaN for empty slots), about 400 bytes at a window of 32.
+    """
+
+    __slots__ = ("times", "pos", "newest")
+
+    def __init__(self, window: int):
+        self.times = array("d", [float("nan")]) * window
+        self.pos = 0
+        self.newest = float("-inf")
+
+    def seen(self, ts: float) -> bool:
+        # Linear scan of a few dozen doubles; NaN never compares equal
+        return ts in self.times
+
+    def add(self, ts: float):
+        self.times[self.pos] = ts
+        self.pos = (self.pos + 1) % len(self.times)
+
+class TelemetryDeduplicator:
+    """
+    Classifies each fix against per-vehicle state: the newest timestamp seen
+    and a bounded window of recent timestamps. Exact resends are dropped,
+    fixes older than the newest one are history-only, everything else is
+    fresh. Memory is O(vehicles * DEDUP_WINDOW).
+    """
+
+    def __init__(self, window: int = Config.DEDUP_WINDOW):
+        self.window = window
+        self.recent: Dict[str, RecentFixes] = {}
+        self.fresh = 0
+        self.late = 0
+        self.duplicates = 0
+
+    def classify(self, vehicle_id: str, timestamp: datetime) -> str:
+        ts = timestamp.timestamp()
+        entry = self.recent.get(vehicle_id)
+        if entry is None:
+            entry = self.recent[vehicle_id] = RecentFixes(self.window)
+
+        if entry.seen(ts):
+            self.duplicates += 1
+            return DUPLICATE
+        entry.add(ts)
+
+        if ts < entry.newest:
+            self.late += 1
+            return LATE
+        entry.newest = ts
+        self.fresh += 1
+        return FRESH
+
+    def forget(self, vehicle_id: str):
+        self.recent.pop(vehicle_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "fresh": self.fresh,
+            "late": self.late,
+            "duplicates": self.duplicates,
+            "tracked_vehicles": len(self.recent),
+        }
+
+deduplicator = TelemetryDeduplicator()
@@ -0,0 +1,236 @@
+import logging
+from typing import TYPE_CHECKING, Dict, Iterable, List, Literal, Optional, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VEHICLE_STATUSES = ("moving", "idle", "offline", "alert", "unknown")
+# For query parameters: unlike Query(enum=...) on a str, Literal rejects unknown values
+VehicleStatus = Literal[VEHICLE_STATUSES]
+STATUS_CODES = {status: code for code, status in enumerate(VEHICLE_STATUSES)}
+UNKNOWN = STATUS_CODES["unknown"]
+OFFLINE = STATUS_CODES["offline"]
+
+FIELDS = ("latitude", "longitude", "speed", "fuel_level", "engine_temp")
+METRICS = ("speed", "fuel_level", "engine_temp")
+INITIAL_CAPACITY = 1024
+
+def _num(value) -> float:
+    # Values seeded from Redis are strings, and may be "None"
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+class FleetSnapshot:
+    """
+    Latest state of every live vehicle as struct-of-arrays: one float64
+    column per field (NaN for missing) and an int8 status code column, with
+    a vehicle_id -> slot map. Removal swaps the last slot into the hole, so
+    the first `size` rows are always dense and every fleet-wide statistic is
+    a single vectorized pass. NumPy is imported on first use to keep it off
+    the startup path.
+    """
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self.initial_capacity = capacity
+        self.capacity = 0
+        self.size = 0
+        self.ids: List[str] = []
+        self.slots: Dict[str, int] = {}
+        self.columns: Dict[str, "np.ndarray"] = {}
+        self.status = None
+
+    def _grow(self):
+        import numpy as np
+
+        capacity = max(self.capacity * 2, self.initial_capacity)
+        columns = {field: np.full(capacity, np.nan) for field in FIELDS}
+        status = np.full(capacity, UNKNOWN, dtype=np.int8)
+        n = self.size
+        for field, column in self.columns.items():
+            columns[field][:n] = column[:n]
+        if self.status is not None:
+            status[:n] = self.status[:n]
+        self.columns, self.status, self.capacity = columns, status, capacity
+
+    def update(self, vehicle_id: str, data: dict):
+        slot = self.slots.get(vehicle_id)
+        if slot is None:
+            if self.size == self.capacity:
+                self._grow()
+            slot = self.slots[vehicle_id] = self.size
+            self.ids.append(vehicle_id)
+            self.size += 1
+        for field in FIELDS:
+            self.columns[field][slot] = _num(data.get(field))
+        self.status[slot] = STATUS_CODES.get(data.get('status') or "unknown", UNKNOWN)
+
+    def load(self, vehicles: Iterable[dict]):
+        for vehicle in vehicles:
+            self.update(vehicle['vehicle_id'], vehicle)
+        logger.info(f"Fleet snapshot seeded with {self.size} vehicles")
+
+    def mark_offline(self, vehicle_ids: Iterable[str]):
+        for vehicle_id in vehicle_ids:
+            slot = self.slots.get(vehicle_id)
+            if slot is not None:
+                self.status[slot] = OFFLINE
+
+    def remove(self, vehicle_ids: Iterable[str]):
+        for vehicle_id in vehicle_ids:
+            slot = self.slots.pop(vehicle_id, None)
+            if slot is None:
+                continue
+            last = self.size - 1
+            if slot != last:
+                moved = self.ids[last]
+                self.ids[slot] = moved
+                self.slots[moved] = slot
+                for column in self.columns.values():
+                    column[slot] = column[last]
+                self.status[slot] = self.status[last]
+            self.ids.pop()
+            self.size = last
+
+    def column(self, field: str) -> "np.ndarray":
+        """Dense view of one field over the live vehicles."""
+        import numpy as np
+
+        if not self.capacity:
+            return np.empty(0)
+        return self.columns[field][:self.size]
+
+    def codes(self) -> "np.ndarray":
+        import numpy as np
+
+        if not self.capacity:
+            return np.empty(0, dtype=np.int8)
+        return self.status[:self.size]
+
+    def status_breakdown(self) -> List[dict]:
+        import numpy as np
+
+        n = self.size
+        if not n:
+            return []
+        codes = self.codes()
+        counts = np.bincount(codes, minlength=len(VEHICLE_STATUSES))
+        averages = {}
+        for field in METRICS:
+            values = self.column(field)
+            present = ~np.isnan(values)
+            sums = np.bincount(codes[present], weights=values[present], minlength=len(VEHICLE_STATUSES))
+            seen = np.bincount(codes[present], minlength=len(VEHICLE_STATUSES))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                averages[field] = sums / seen
+
+        result = []
+        for code, status in enumerate(VEHICLE_STATUSES):
+            if not counts[code]:
+                continue
+            entry = {"status": status, "count": int(counts[code]), "share": round(counts[code] / n * 100, 1)}
+            for field in METRICS:
+                avg = averages[field][code]
+                entry[f"avg_{field}"] = None if np.isnan(avg) else round(float(avg), 1)
+            result.append(entry)
+        return result
+
+    def summary(self) -> dict:
+        """Counts and average moving speed in the shape of the dashboard stats."""
+        import numpy as np
+
+        codes = self.codes()
+        counts = np.bincount(codes, minlength=len(VEHICLE_STATUSES))
+        moving = codes == STATUS_CODES["moving"]
+        speeds = np.nan_to_num(self.column("speed")[moving])
+        return {
+            "total_vehicles": self.size,
+            "active_vehicles": int(counts[STATUS_CODES["moving"]]),
+            "idle_vehicles": int(counts[STATUS_CODES["idle"]]),
+            "offline_vehicles": int(counts[OFFLINE]),
+            "avg_speed": round(float(speeds.mean()), 1) if speeds.size else 0,
+        }
+
+    def histogram(self, field: str, bins: int = 20, value_range: Optional[Sequence[float]] = None) -> dict:
+        import numpy as np
+
+        values = self.column(field)
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return {"metric": field, "edges": [], "counts": []}
+        counts, edges = np.histogram(values, bins=bins, range=value_range)
+        return {"metric": field, "edges": np.round(edges, 2).tolist(), "counts": counts.tolist()}
+
+    def percentiles(self, field: str, qs: Sequence[float] = (50, 90, 95, 99)) -> dict:
+        import numpy as np
+
+        values = self.column(field)
+        values = values[~np.isnan(values)]
+        result = {"metric": field, "count": int(values.size)}
+        if not values.size:
+            return result
+        result.update({
+            "min": round(float(values.min()), 2),
+            "max": round(float(values.max()), 2),
+            "mean": round(float(values.mean()), 2),
+        })
+        for q, value in zip(qs, np.percentile(values, qs)):
+            result[f"p{q:g}"] = round(float(value), 2)
+        return result
+
+    def low_fuel(self, threshold: float, limit: int = 100) -> List[dict]:
+        import numpy as np
+
+        fuel = self.column("fuel_level")
+        with np.errstate(invalid="ignore"):
+            rows = np.flatnonzero(fuel < threshold)
+        if rows.size > limit:
+            # Only the `limit` lowest need sorting
+            rows = rows[np.argpartition(fuel[rows], limit - 1)[:limit]]
+        rows = rows[np.argsort(fuel[rows], kind="stable")]
+        lats, lngs = self.column("latitude"), self.column("longitude")
+        return [
+            {
+                "vehicle_id": self.ids[i],
+                "fuel_level": round(float(fuel[i]), 1),
+                "latitude": float(lats[i]),
+                "longitude": float(lngs[i]),
+                "status": VEHICLE_STATUSES[self.status[i]],
+            }
+            for i in rows
+        ]
+
+    def heatmap(self, cell_deg: float, bounds: Optional[Sequence[float]] = None,
+                status: Optional[str] = None) -> List[dict]:
+        """
+        Vehicle counts per grid cell of `cell_deg` degrees, optionally within
+        (min_lat, min_lng, max_lat, max_lng). Only non-empty cells are returned,
+        keyed by their south-west corner.
+        """
+        import numpy as np
+
+        lats, lngs = self.column("latitude"), self.column("longitude")
+        keep = ~(np.isnan(lats) | np.isnan(lngs))
+        if bounds is not None:
+            min_lat, min_lng, max_lat, max_lng = bounds
+            keep &= (lats >= min_lat) & (lats <= max_lat) & (lngs >= min_lng) & (lngs <= max_lng)
+        if status is not None:
+            keep &= self.codes() == STATUS_CODES[status]
+        if not keep.any():
+            return []
+        rows = np.floor(lats[keep] / cell_deg).astype(np.int64)
+        cols = np.floor(lngs[keep] / cell_deg).astype(np.int64)
+        # Flatten (row, col) into one integer key; 1-D unique is much faster than axis=0
+        col_min = cols.min()
+        width = cols.max() - col_min + 1
+        keys, counts = np.unique(rows * width + (cols - col_min), return_counts=True)
+        cell_rows, cell_cols = np.divmod(keys, width)
+        return [
+            {"latitude": round(r * cell_deg, 6), "longitude": round((c + col_min) * cell_deg, 6), "count": count}
+            for r, c, count in zip(cell_rows.tolist(), cell_cols.tolist(), counts.tolist())
+        ]
+
+fleet_snapshot = FleetSnapshot()
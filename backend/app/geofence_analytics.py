@@ -0,0 +1,191 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+from .database import get_db_pool, get_ingest_pool
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING_VISITS = 10000
+
+UPSERT_ROLLUP_SQL = """
+    INSERT INTO geofence_rollups (geofence_id, bucket, enters, exits, dwell_seconds, max_dwell)
+    VALUES ($1::uuid, $2, $3, $4, $5, $6)
+    ON CONFLICT (geofence_id, bucket) DO UPDATE SET
+        enters = geofence_rollups.enters + EXCLUDED.enters,
+        exits = geofence_rollups.exits + EXCLUDED.exits,
+        dwell_seconds = geofence_rollups.dwell_seconds + EXCLUDED.dwell_seconds,
+        max_dwell = GREATEST(geofence_rollups.max_dwell, EXCLUDED.max_dwell)
+"""
+
+INSERT_VISIT_SQL = """
+    INSERT INTO geofence_visits (geofence_id, vehicle_id, entered_at, exited_at, dwell_seconds)
+    VALUES ($1::uuid, $2, $3, $4, $5)
+"""
+
+def hour_bucket(ts: datetime) -> datetime:
+    # Naive timestamps are local time, matching how asyncpg encodes TIMESTAMPTZ
+    return ts.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+class GeofenceTracker:
+    """
+    Tracks which vehicles are inside which geofences from the live telemetry
+    stream. Enter/exit counts and dwell times are accumulated per fence and
+    hour in memory and periodically upserted into `geofence_rollups`.
+    """
+
+    def __init__(self):
+        self.fences: Dict[str, dict] = {}
+        self._index = None
+        # vehicle_id -> {fence_id: entered_at}, only for vehicles inside a fence
+        self.inside: Dict[str, Dict[str, datetime]] = {}
+        # vehicle_id -> time of the latest fix, for the same vehicles
+        self.last_fix: Dict[str, datetime] = {}
+        # fence_id -> {vehicle_id: entered_at}
+        self.occupants: Dict[str, Dict[str, datetime]] = defaultdict(dict)
+        # (fence_id, bucket) -> [enters, exits, dwell_seconds, max_dwell]
+        self.pending: Dict[Tuple[str, datetime], List[float]] = {}
+        self.pending_visits: List[tuple] = []
+
+    async def load(self):
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch("SELECT * FROM geofences")
+        self.fences = {}
+        for row in rows:
+            self.add_fence(dict(row))
+        logger.info(f"Loaded {len(self.fences)} geofences for tracking")
+
+    def add_fence(self, fence: dict):
+        self.fences[str(fence['id'])] = fence
+        self._index = None
+
+    def remove_fence(self, fence_id: str):
+        self.fences.pop(fence_id, None)
+        self._index = None
+        for vehicle_id in self.occupants.pop(fence_id, {}):
+            current = self.inside.get(vehicle_id)
+            if current is None:
+                continue
+            current.pop(fence_id, None)
+            if not current:
+                del self.inside[vehicle_id]
+                self.last_fix.pop(vehicle_id, None)
+
+    @property
+    def index(self):
+        if self._index is None:
+            # NumPy is only loaded once there are fences to evaluate
+            from .geometry import GeofenceIndex
+            self._index = GeofenceIndex(self.fences)
+        return self._index
+
+    def _counter(self, fence_id: str, ts: datetime) -> List[float]:
+        key = (fence_id, hour_bucket(ts))
+        counter = self.pending.get(key)
+        if counter is None:
+            counter = self.pending[key] = [0, 0, 0.0, 0.0]
+        return counter
+
+    def process(self, vehicle_id: str, lat: float, lng: float, ts: datetime):
+        """Update occupancy for one position fix."""
+        if not self.fences:
+            return
+        self._transition(vehicle_id, self.index.containing(lat, lng), ts)
+
+    def _transition(self, vehicle_id: str, now_inside: Set[str], ts: datetime):
+        current = self.inside.get(vehicle_id)
+        if current is None:
+            if not now_inside:
+                return
+            current = self.inside[vehicle_id] = {}
+
+        for fence_id in now_inside - current.keys():
+            current[fence_id] = ts
+            self.occupants[fence_id][vehicle_id] = ts
+            self._counter(fence_id, ts)[0] += 1
+
+        for fence_id in current.keys() - now_inside:
+            self._exit(fence_id, vehicle_id, current.pop(fence_id), ts)
+
+        if current:
+            self.last_fix[vehicle_id] = ts
+        else:
+            del self.inside[vehicle_id]
+            self.last_fix.pop(vehicle_id, None)
+
+    def _exit(self, fence_id: str, vehicle_id: str, entered_at: datetime, ts: datetime):
+        self.occupants[fence_id].pop(vehicle_id, None)
+        dwell = max((ts - entered_at).total_seconds(), 0.0)
+        counter = self._counter(fence_id, ts)
+        counter[1] += 1
+        counter[2] += dwell
+        counter[3] = max(counter[3], dwell)
+        self.pending_visits.append((fence_id, vehicle_id, entered_at, ts, dwell))
+
+    def forget(self, vehicle_id: str):
+        """Close the open visits of a vehicle that went silent, exiting at its last fix."""
+        current = self.inside.pop(vehicle_id, None)
+        last_fix = self.last_fix.pop(vehicle_id, None)
+        if not current:
+            return
+        for fence_id, entered_at in current.items():
+            self._exit(fence_id, vehicle_id, entered_at, last_fix or entered_at)
+
+    def occupancy(self, fence_id: Optional[str] = None) -> List[dict]:
+        fence_ids = [fence_id] if fence_id else list(self.fences)
+        result = []
+        for fid in fence_ids:
+            fence = self.fences.get(fid)
+            if not fence:
+                continue
+            occupants = self.occupants.get(fid, {})
+            result.append({
+                "geofence_id": fid,
+                "name": fence.get('name'),
+                "vehicle_count": len(occupants),
+                "vehicles": [
+                    {
+                        "vehicle_id": vid,
+                        "entered_at": entered_at,
+                        "dwell_seconds": round(max((datetime.now(entered_at.tzinfo) - entered_at).total_seconds(), 0.0), 1),
+                    }
+                    for vid, entered_at in occupants.items()
+                ],
+            })
+        return result
+
+    def pending_stats(self, fence_id: str) -> Dict[datetime, List[float]]:
+        return {bucket: counter for (fid, bucket), counter in self.pending.items() if fid == fence_id}
+
+    async def flush(self):
+        """Persist accumulated counters and completed visits in one batch each."""
+        if not self.pending and not self.pending_visits:
+            return
+        pending, self.pending = self.pending, {}
+        visits, self.pending_visits = self.pending_visits, []
+        rollups = [
+            (fid, bucket, int(c[0]), int(c[1]), c[2], c[3])
+            for (fid, bucket), c in pending.items()
+        ]
+        try:
+            pool = await get_ingest_pool()
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    if rollups:
+                        await conn.executemany(UPSERT_ROLLUP_SQL, rollups)
+                    if visits:
+                        await conn.executemany(INSERT_VISIT_SQL, visits)
+        except Exception as e:
+            logger.error(f"Geofence rollup flush failed: {e}")
+            # Merge back so counters are retried on the next flush
+            for key, counter in pending.items():
+                merged = self._counter(key[0], key[1])
+                merged[0] += counter[0]
+                merged[1] += counter[1]
+                merged[2] += counter[2]
+                merged[3] = max(merged[3], counter[3])
+            # Keep the newest visits for retry if the database stays down
+            self.pending_visits = (visits + self.pending_visits)[-MAX_PENDING_VISITS:]
+
+geofence_tracker = GeofenceTracker()
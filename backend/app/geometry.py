@@ -0,0 +1,116 @@
+import numpy as np
+from typing import Dict, List, Sequence, Set, Tuple
+from .geodesy import EARTH_RADIUS_M, METERS_PER_DEG_LAT
+
+def bounding_box(coords: Sequence[Sequence[float]], buffer_m: float = 0.0) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lng, max_lat, max_lng) of [[lat, lng], ...], grown by `buffer_m`."""
+    pts = np.asarray(coords, dtype=np.float64)
+    min_lat, min_lng = pts.min(axis=0)
+    max_lat, max_lng = pts.max(axis=0)
+    dlat = buffer_m / METERS_PER_DEG_LAT
+    dlng = buffer_m / (METERS_PER_DEG_LAT * max(np.cos(np.radians(max(abs(min_lat), abs(max_lat)))), 1e-6))
+    return float(min_lat - dlat), float(min_lng - dlng), float(max_lat + dlat), float(max_lng + dlng)
+
+def circle_bounding_box(lat: float, lng: float, radius_m: float) -> Tuple[float, float, float, float]:
+    return bounding_box([[lat, lng]], radius_m)
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """Great-circle distance in metres; array form of geodesy.haversine_m."""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = np.radians(lng2 - lng1)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+def points_in_circle(lats: np.ndarray, lngs: np.ndarray, lat: float, lng: float, radius_m: float) -> np.ndarray:
+    return haversine_m(lats, lngs, lat, lng) <= radius_m
+
+def points_in_polygon(lats: np.ndarray, lngs: np.ndarray, poly: np.ndarray) -> np.ndarray:
+    """
+    Even-odd ray casting of N points against an (M, 2) [lat, lng] ring.
+    All N x M edge crossings are evaluated in one broadcast.
+    """
+    y = lats[:, None]
+    x = lngs[:, None]
+    y1, x1 = poly[:, 0][None, :], poly[:, 1][None, :]
+    y2, x2 = np.roll(poly[:, 0], -1)[None, :], np.roll(poly[:, 1], -1)[None, :]
+    straddles = (y1 > y) != (y2 > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    crossings = straddles & (x < x_cross)
+    return (np.count_nonzero(crossings, axis=1) % 2) == 1
+
+def points_near_polyline(lats: np.ndarray, lngs: np.ndarray, line: np.ndarray, buffer_m: float) -> np.ndarray:
+    """True where a point lies within `buffer_m` of any segment of an (M, 2) polyline."""
+    # Local equirectangular projection around the polyline is accurate at corridor scale
+    k_lng = METERS_PER_DEG_LAT * np.cos(np.radians(line[:, 0].mean()))
+    px = (lngs * k_lng)[:, None]
+    py = (lats * METERS_PER_DEG_LAT)[:, None]
+    ax, ay = line[:-1, 1] * k_lng, line[:-1, 0] * METERS_PER_DEG_LAT
+    bx, by = line[1:, 1] * k_lng, line[1:, 0] * METERS_PER_DEG_LAT
+    dx, dy = bx - ax, by - ay
+    seg_len2 = dx * dx + dy * dy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = ((px - ax) * dx + (py - ay) * dy) / seg_len2
+    t = np.clip(np.nan_to_num(t), 0.0, 1.0)
+    cx = ax + t * dx
+    cy = ay + t * dy
+    dist2 = (px - cx) ** 2 + (py - cy) ** 2
+    return (dist2 <= buffer_m * buffer_m).any(axis=1)
+
+def fence_bounding_box(fence: dict) -> Tuple[float, float, float, float]:
+    if fence.get('min_lat') is not None:
+        return fence['min_lat'], fence['min_lng'], fence['max_lat'], fence['max_lng']
+    shape = fence.get('shape') or 'circle'
+    if shape == 'circle':
+        return circle_bounding_box(fence['center_lat'], fence['center_lng'], fence['radius_meters'])
+    buffer_m = (fence.get('buffer_meters') or 0.0) if shape == 'corridor' else 0.0
+    return bounding_box(fence['coordinates'], buffer_m)
+
+class GeofenceIndex:
+    """
+    Compiled set of circle, polygon and corridor fences. Points are first
+    filtered against every fence's bounding box in one broadcast, then only
+    the candidates are run through the exact shape test.
+    """
+
+    def __init__(self, fences: Dict[str, dict]):
+        self.ids: List[str] = list(fences)
+        self.fences = [fences[fid] for fid in self.ids]
+        self.bboxes = np.array(
+            [fence_bounding_box(f) for f in self.fences], dtype=np.float64
+        ).reshape(-1, 4)
+        self._shapes = [
+            np.asarray(f['coordinates'], dtype=np.float64) if f.get('coordinates') else None
+            for f in self.fences
+        ]
+
+    def evaluate(self, lats: Sequence[float], lngs: Sequence[float]) -> np.ndarray:
+        """Boolean (N points, F fences) containment matrix."""
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        result = np.zeros((lats.size, len(self.ids)), dtype=bool)
+        if not self.ids or not lats.size:
+            return result
+
+        b = self.bboxes
+        candidates = (
+            (lats[:, None] >= b[:, 0]) & (lats[:, None] <= b[:, 2]) &
+            (lngs[:, None] >= b[:, 1]) & (lngs[:, None] <= b[:, 3])
+        )
+        for j in np.flatnonzero(candidates.any(axis=0)):
+            rows = np.flatnonzero(candidates[:, j])
+            fence = self.fences[j]
+            shape = fence.get('shape') or 'circle'
+            if shape == 'polygon':
+                inside = points_in_polygon(lats[rows], lngs[rows], self._shapes[j])
+            elif shape == 'corridor':
+                inside = points_near_polyline(lats[rows], lngs[rows], self._shapes[j], fence.get('buffer_meters') or 0.0)
+            else:
+                inside = points_in_circle(lats[rows], lngs[rows], fence['center_lat'], fence['center_lng'], fence['radius_meters'])
+            result[rows, j] = inside
+        return result
+
+    def containing(self, lat: float, lng: float) -> Set[str]:
+        row = self.evaluate([lat], [lng])[0]
+        return {self.ids[j] for j in np.flatnonzero(row)}
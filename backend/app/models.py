@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 
 class VehicleTelemetry(BaseModel):
@@ -25,10 +25,64 @@ class VehicleSummary(BaseModel):
     status: str
     last_update: datetime
 
+class NearbyVehicle(VehicleSummary):
+    distance_km: float
+
 class Geofence(BaseModel):
     id: Optional[UUID] = None
     name: str
-    center_lat: float
-    center_lng: float
-    radius_meters: float
+    shape: Literal["circle", "polygon", "corridor"] = "circle"
+    # Circle
+    center_lat: Optional[float] = None
+    center_lng: Optional[float] = None
+    radius_meters: Optional[float] = None
+    # Polygon ring or corridor centreline as [[lat, lng], ...]
+    coordinates: Optional[List[List[float]]] = None
+    # Corridor half-width
+    buffer_meters: Optional[float] = None
     color: str = "#3B82F6"
+
+    @model_validator(mode="after")
+    def check_shape(self):
+        if self.shape == "circle":
+            if self.center_lat is None or self.center_lng is None or self.radius_meters is None:
+                raise ValueError("circle geofences require center_lat, center_lng and radius_meters")
+        elif self.shape == "polygon":
+            if not self.coordinates or len(self.coordinates) < 3:
+                raise ValueError("polygon geofences require at least 3 coordinates")
+        else:
+            if not self.coordinates or len(self.coordinates) < 2:
+                raise ValueError("corridor geofences require at least 2 coordinates")
+            if not self.buffer_meters or self.buffer_meters <= 0:
+                raise ValueError("corridor geofences require a positive buffer_meters")
+        if self.coordinates and any(len(point) != 2 for point in self.coordinates):
+            raise ValueError("coordinates must be [lat, lng] pairs")
+        return self
+
+MAX_BATCH_VEHICLES = 1000
+
+class BatchHistoryRequest(BaseModel):
+    # Exactly one of vehicle_ids, geofence_id or bbox selects the vehicles
+    vehicle_ids: Optional[List[str]] = None
+    geofence_id: Optional[UUID] = None
+    # [min_lat, min_lng, max_lat, max_lng]
+    bbox: Optional[List[float]] = None
+    start_time: datetime
+    end_time: datetime
+    # Downsample to one point per vehicle per step
+    step_seconds: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        selectors = [self.vehicle_ids is not None, self.geofence_id is not None, self.bbox is not None]
+        if sum(selectors) != 1:
+            raise ValueError("provide exactly one of vehicle_ids, geofence_id or bbox")
+        if self.vehicle_ids is not None and not 1 <= len(self.vehicle_ids) <= MAX_BATCH_VEHICLES:
+            raise ValueError(f"vehicle_ids must contain between 1 and {MAX_BATCH_VEHICLES} ids")
+        if self.bbox is not None and (len(self.bbox) != 4 or self.bbox[0] > self.bbox[2] or self.bbox[1] > self.bbox[3]):
+            raise ValueError("bbox must be [min_lat, min_lng, max_lat, max_lng]")
+        if self.start_time >= self.end_time:
+            raise ValueError("start_time must be before end_time")
+        if self.step_seconds is not None and self.step_seconds < 1:
+            raise ValueError("step_seconds must be positive")
+        return self
@@ -1,11 +1,17 @@
 import json
 import asyncio
 import logging
-import paho.mqtt.client as mqtt
-from datetime import datetime
+from pydantic import ValidationError
 from .config import Config
-from .database import save_telemetry
+from .models import VehicleTelemetry
+from .database import save_telemetry, ingest_healthy, mark_ingest_unhealthy, is_connection_error, is_undefined_table
 from .redis_manager import redis_manager
+from .geofence_analytics import geofence_tracker
+from .alerts import alert_engine
+from .spool import telemetry_spool
+from .dedup import deduplicator, DUPLICATE, LATE
+from .trips import trip_segmenter
+from .fleet_snapshot import fleet_snapshot
 
 logger = logging.getLogger(__name__)
 loop = None
@@ -14,18 +20,54 @@ def on_connect(client, userdata, flags, rc):
     logger.info(f"Connected to MQTT Broker with result code {rc}")
     client.subscribe(Config.MQTT_TOPIC)
 
+async def persist_telemetry(payload):
+    # While the database is failing or slow, spool to disk instead of dropping
+    # the fix; the replay worker loads it once the ingest pool is healthy again.
+    # A write that times out after the server already committed it is replayed
+    # as well, leaving a duplicate row in history: there is no unique key on
+    # vehicle_telemetry for COPY to skip it, and the deduplicator only guards
+    # live state.
+    if ingest_healthy():
+        try:
+            await asyncio.wait_for(save_telemetry(payload), Config.SPOOL_WRITE_TIMEOUT)
+            return
+        except Exception as e:
+            if is_connection_error(e):
+                logger.error(f"Telemetry write failed, spooling to disk: {e!r}")
+                mark_ingest_unhealthy()
+            elif is_undefined_table(e):
+                # Startup race: schema not created yet, the pool itself is fine
+                logger.warning("Telemetry table not ready, spooling to disk")
+            else:
+                logger.error(f"Telemetry rejected by database for {payload['vehicle_id']}: {e!r}")
+                return
+    telemetry_spool.append(payload)
+
 async def process_message(payload):
-    await save_telemetry(payload)
+    verdict = deduplicator.classify(payload['vehicle_id'], payload['timestamp'])
+    if verdict == DUPLICATE:
+        return
+    await persist_telemetry(payload)
+    if verdict == LATE:
+        # Late fixes belong in history but must not overwrite newer live state
+        return
     await redis_manager.update_vehicle_state(payload['vehicle_id'], payload)
+    fleet_snapshot.update(payload['vehicle_id'], payload)
+    geofence_tracker.process(payload['vehicle_id'], payload['latitude'], payload['longitude'], payload['timestamp'])
+    alert_engine.process(payload)
+    trip_segmenter.process(payload)
 
 def on_message(client, userdata, msg):
     try:
-        payload = json.loads(msg.payload.decode())
-        
-        # Ensure timestamp is parsed
-        if isinstance(payload.get('timestamp'), str):
-            payload['timestamp'] = datetime.fromisoformat(payload['timestamp'])
-            
+        raw = json.loads(msg.payload.decode())
+        try:
+            # Validate up front so a malformed fix cannot fail the DB write or the
+            # spool encoder; this also parses the timestamp
+            payload = VehicleTelemetry.model_validate(raw).model_dump(exclude_none=True)
+        except ValidationError as e:
+            logger.warning(f"Dropping malformed telemetry on {msg.topic}: {e.error_count()} invalid field(s)")
+            return
+
         # Fire and forget async task
         if loop:
             asyncio.run_coroutine_threadsafe(process_message(payload), loop)
@@ -33,6 +75,8 @@ def on_message(client, userdata, msg):
         logger.error(f"Error processing message: {e}")
 
 def start_mqtt(event_loop):
+    import paho.mqtt.client as mqtt
+
     global loop
     loop = event_loop
     
@@ -1,16 +1,34 @@
 import json
+import math
+import time
 import logging
-import redis.asyncio as redis
-from typing import Optional, List, Dict
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional, List, Dict, Tuple
 from .config import Config
+from .geodesy import METERS_PER_DEG_LAT
+from .alerts import alert_engine
+from .fleet_snapshot import fleet_snapshot, VEHICLE_STATUSES
+
+if TYPE_CHECKING:
+    import redis.asyncio as redis
 
 logger = logging.getLogger(__name__)
 
+GEO_KEY = "vehicles:geo"
+LAST_SEEN_KEY = "vehicles:last_seen"
+SWEEP_CHUNK = 1000
+KM_PER_DEG_LAT = METERS_PER_DEG_LAT / 1000.0
+
+def geo_key(status: Optional[str] = None) -> str:
+    return f"{GEO_KEY}:{status}" if status else GEO_KEY
+
 class RedisManager:
     _instance = None
     
     def __init__(self):
-        self.redis: Optional[redis.Redis] = None
+        self.redis: Optional["redis.Redis"] = None
+        # Upper score bound of the last offline sweep, so each silent vehicle is marked once
+        self._offline_swept_until: Optional[float] = None
 
     @classmethod
     def get_instance(cls):
@@ -19,6 +37,8 @@ class RedisManager:
         return cls._instance
 
     async def connect(self):
+        import redis.asyncio as redis
+
         try:
             self.redis = redis.from_url(Config.REDIS_URL, encoding="utf-8", decode_responses=True)
             await self.redis.ping()
@@ -37,17 +57,48 @@ class RedisManager:
             return
         
         try:
-            # Store latest state in a hash
             key = f"vehicle:{vehicle_id}"
-            await self.redis.hset(key, mapping={k: str(v) for k, v in data.items()})
-            # Set TTL (optional, e.g. 1 hour) to auto-clean stale vehicles
-            await self.redis.expire(key, 3600)
-            
-            # Add to set of active vehicles
-            await self.redis.sadd("vehicles:active", vehicle_id)
+            status = data.get('status') or "unknown"
+            # Status is free-form; only known statuses get their own GEO set
+            if status not in VEHICLE_STATUSES:
+                status = "unknown"
+            pipe = self.redis.pipeline(transaction=False)
+            # Store latest state in a hash
+            pipe.hset(key, mapping={k: str(v) for k, v in data.items()})
+            # Set TTL to auto-clean stale vehicles
+            pipe.expire(key, Config.VEHICLE_TTL)
+            # Add to set of active vehicles, with last-seen time for the offline sweeper
+            pipe.sadd("vehicles:active", vehicle_id)
+            ts = data.get('timestamp')
+            pipe.zadd(LAST_SEEN_KEY, {vehicle_id: ts.timestamp() if isinstance(ts, datetime) else time.time()})
+            # Spatial index: one GEO set for the whole fleet and one per status
+            position = (data['longitude'], data['latitude'], vehicle_id)
+            pipe.geoadd(geo_key(), position)
+            pipe.geoadd(geo_key(status), position)
+            for other in VEHICLE_STATUSES:
+                if other != status:
+                    pipe.zrem(geo_key(other), vehicle_id)
+            await pipe.execute()
         except Exception as e:
             logger.error(f"Redis update failed: {e}")
 
+    async def _fetch_vehicles(self, vehicle_ids) -> List[Dict]:
+        pipe = self.redis.pipeline()
+        for vid in vehicle_ids:
+            pipe.hgetall(f"vehicle:{vid}")
+        results = await pipe.execute()
+
+        vehicles = []
+        for vid, data in zip(vehicle_ids, results):
+            if data:
+                data['vehicle_id'] = vid
+                # Basic type conversion if needed, though frontend handles strings mostly
+                if 'speed' in data: data['speed'] = float(data['speed'])
+                if 'latitude' in data: data['latitude'] = float(data['latitude'])
+                if 'longitude' in data: data['longitude'] = float(data['longitude'])
+                vehicles.append(data)
+        return vehicles
+
     async def get_all_vehicles(self) -> List[Dict]:
         if not self.redis:
             return []
@@ -56,29 +107,124 @@ class RedisManager:
             vehicle_ids = await self.redis.smembers("vehicles:active")
             if not vehicle_ids:
                 return []
-            
-            pipe = self.redis.pipeline()
-            for vid in vehicle_ids:
-                pipe.hgetall(f"vehicle:{vid}")
-            
-            results = await pipe.execute()
-            
-            vehicles = []
-            for vid, data in zip(vehicle_ids, results):
-                if data:
-                    data['vehicle_id'] = vid
-                    # Basic type conversion if needed, though frontend handles strings mostly
-                    if 'speed' in data: data['speed'] = float(data['speed'])
-                    if 'latitude' in data: data['latitude'] = float(data['latitude'])
-                    if 'longitude' in data: data['longitude'] = float(data['longitude'])
-                    vehicles.append(data)
-            
-            return vehicles
+            return await self._fetch_vehicles(list(vehicle_ids))
         except Exception as e:
             logger.error(f"Redis fetch failed: {e}")
             return []
 
+    async def get_vehicles_in_bbox(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+                                   status: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        if not self.redis:
+            return []
+
+        try:
+            center_lat = (min_lat + max_lat) / 2
+            center_lng = (min_lng + max_lng) / 2
+            # BYBOX is measured in km around the centre; size it on the edge nearest
+            # the equator so it covers the requested bbox, then trim exactly below.
+            widest_lat = 0.0 if min_lat <= 0 <= max_lat else min(abs(min_lat), abs(max_lat))
+            width_km = (max_lng - min_lng) * KM_PER_DEG_LAT * math.cos(math.radians(widest_lat))
+            height_km = (max_lat - min_lat) * KM_PER_DEG_LAT
+            matches = await self.redis.geosearch(
+                geo_key(status), longitude=center_lng, latitude=center_lat,
+                width=max(width_km, 0.001), height=max(height_km, 0.001), unit="km", withcoord=True
+            )
+            vehicle_ids = [
+                vid for vid, (lng, lat) in matches
+                if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng
+            ]
+            if limit:
+                vehicle_ids = vehicle_ids[:limit]
+            if not vehicle_ids:
+                return []
+            return await self._fetch_vehicles(vehicle_ids)
+        except Exception as e:
+            logger.error(f"Redis bbox search failed: {e}")
+            return []
+
+    async def get_nearest_vehicles(self, lat: float, lng: float, k: int = 10, status: Optional[str] = None,
+                                   radius_km: float = 50.0) -> List[Dict]:
+        if not self.redis:
+            return []
+
+        try:
+            matches = await self.redis.geosearch(
+                geo_key(status), longitude=lng, latitude=lat, radius=radius_km, unit="km",
+                sort="ASC", count=k, withdist=True
+            )
+            if not matches:
+                return []
+            distances = {vid: dist for vid, dist in matches}
+            vehicles = await self._fetch_vehicles([vid for vid, _ in matches])
+            for v in vehicles:
+                v['distance_km'] = round(float(distances[v['vehicle_id']]), 3)
+            return vehicles
+        except Exception as e:
+            logger.error(f"Redis nearest search failed: {e}")
+            return []
+
+    async def sweep_stale_vehicles(self) -> Tuple[List[str], List[str]]:
+        """
+        Mark vehicles silent for VEHICLE_OFFLINE_AFTER as offline and prune
+        those silent for VEHICLE_TTL from every live-state key in bulk.
+        Returns (offline_ids, expired_ids).
+        """
+        if not self.redis:
+            return [], []
+
+        now = time.time()
+        expire_cutoff = now - Config.VEHICLE_TTL
+        offline_cutoff = now - Config.VEHICLE_OFFLINE_AFTER
+        lower = self._offline_swept_until if self._offline_swept_until is not None else expire_cutoff
+
+        try:
+            offline_ids = await self.redis.zrangebyscore(LAST_SEEN_KEY, f"({lower}", offline_cutoff)
+            for start in range(0, len(offline_ids), SWEEP_CHUNK):
+                await self._mark_offline(offline_ids[start:start + SWEEP_CHUNK])
+            self._offline_swept_until = offline_cutoff
+
+            expired_ids = await self.redis.zrangebyscore(LAST_SEEN_KEY, "-inf", expire_cutoff)
+            for start in range(0, len(expired_ids), SWEEP_CHUNK):
+                chunk = expired_ids[start:start + SWEEP_CHUNK]
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.srem("vehicles:active", *chunk)
+                pipe.zrem(geo_key(), *chunk)
+                for status in VEHICLE_STATUSES:
+                    pipe.zrem(geo_key(status), *chunk)
+                pipe.delete(*[f"vehicle:{vid}" for vid in chunk])
+                await pipe.execute()
+            if expired_ids:
+                await self.redis.zremrangebyscore(LAST_SEEN_KEY, "-inf", expire_cutoff)
+
+            if offline_ids or expired_ids:
+                logger.info(f"Offline sweep: {len(offline_ids)} marked offline, {len(expired_ids)} pruned")
+            return offline_ids, expired_ids
+        except Exception as e:
+            logger.error(f"Redis offline sweep failed: {e}")
+            return [], []
+
+    async def _mark_offline(self, vehicle_ids: List[str]):
+        # Move vehicles into the offline GEO set at their last known position
+        positions = await self.redis.geopos(geo_key(), *vehicle_ids)
+        pipe = self.redis.pipeline(transaction=False)
+        for vid, position in zip(vehicle_ids, positions):
+            pipe.hset(f"vehicle:{vid}", "status", "offline")
+            if position:
+                pipe.geoadd(geo_key("offline"), (position[0], position[1], vid))
+            for status in VEHICLE_STATUSES:
+                if status != "offline":
+                    pipe.zrem(geo_key(status), vid)
+        await pipe.execute()
+
     async def get_stats(self) -> Dict:
+        if fleet_snapshot.size:
+            # Counts and averages come from the in-memory arrays, no Redis round trip
+            return {
+                **fleet_snapshot.summary(),
+                "alert_count": alert_engine.active_count(),
+                # Placeholder for now
+                "total_distance_today": 1250
+            }
         if not self.redis:
             return {}
 
@@ -99,8 +245,8 @@ class RedisManager:
                 "idle_vehicles": idle,
                 "offline_vehicles": offline,
                 "avg_speed": round(avg_speed, 1),
-                # Placeholders for now
-                "alert_count": 0,
+                "alert_count": alert_engine.active_count(),
+                # Placeholder for now
                 "total_distance_today": 1250 
             }
         except Exception as e:
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from ..database import get_db_pool
+from ..alerts import alert_engine
+
+router = APIRouter()
+
+@router.get("/alerts", tags=["Alerts"])
+async def get_alerts(limit: int = Query(100, ge=1, le=1000), vehicle_id: Optional[str] = None):
+    pool = await get_db_pool()
+    if not pool:
+        raise HTTPException(status_code=503, detail="Database not ready")
+
+    query = """
+        SELECT id, time AS timestamp, vehicle_id, type, severity, message, value
+        FROM alerts
+        WHERE $1::text IS NULL OR vehicle_id = $1
+        ORDER BY time DESC
+        LIMIT $2;
+    """
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(query, vehicle_id, limit)
+    return [dict(row) for row in rows]
+
+@router.get("/alerts/active", tags=["Alerts"])
+async def get_active_alerts():
+    return alert_engine.active_alerts()
@@ -1,9 +1,24 @@
 from fastapi import APIRouter, HTTPException, Query
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Literal, Optional
+from datetime import timedelta
 from ..database import get_db_pool
+from ..fleet_snapshot import fleet_snapshot, METRICS, VehicleStatus
 
 router = APIRouter()
 
+# Bucket width and window are bound as parameters (not interpolated) so every
+# range shares one prepared statement.
+SPEED_TREND_SQL = """
+    SELECT 
+        time_bucket($1::interval, time) AS bucket,
+        AVG(speed) as avg_speed,
+        MAX(speed) as max_speed
+    FROM vehicle_telemetry
+    WHERE time > NOW() - $2::interval
+    GROUP BY bucket
+    ORDER BY bucket ASC;
+"""
+
 @router.get("/analytics/speed-trend", tags=["Analytics"])
 async def get_speed_trend(range: str = Query("7d", enum=["24h", "7d", "30d"])):
     pool = await get_db_pool()
@@ -12,28 +27,17 @@ async def get_speed_trend(range: str = Query("7d", enum=["24h", "7d", "30d"])):
     
     # Determine bucket size and interval based on range
     if range == "24h":
-        bucket_width = "1 hour"
-        filter_interval = "24 hours"
+        bucket_width = timedelta(hours=1)
+        filter_interval = timedelta(hours=24)
     elif range == "7d":
-        bucket_width = "1 day"
-        filter_interval = "7 days"
+        bucket_width = timedelta(days=1)
+        filter_interval = timedelta(days=7)
     else:
-        bucket_width = "1 day"
-        filter_interval = "30 days"
+        bucket_width = timedelta(days=1)
+        filter_interval = timedelta(days=30)
 
-    query = f"""
-        SELECT 
-            time_bucket('{bucket_width}', time) AS bucket,
-            AVG(speed) as avg_speed,
-            MAX(speed) as max_speed
-        FROM vehicle_telemetry
-        WHERE time > NOW() - INTERVAL '{filter_interval}'
-        GROUP BY bucket
-        ORDER BY bucket ASC;
-    """
-    
     async with pool.acquire() as conn:
-        rows = await conn.fetch(query)
+        rows = await conn.fetch(SPEED_TREND_SQL, bucket_width, filter_interval)
     
     return [
         {
@@ -129,3 +133,54 @@ async def get_idle_stats():
         }
         for row in rows
     ]
+
+# Live fleet analytics, computed in memory over the fleet snapshot arrays.
+# Literal (unlike Query(enum=...) on a str) rejects unknown values with a 422.
+Metric = Literal[METRICS]
+
+@router.get("/analytics/fleet/status", tags=["Analytics"])
+async def get_fleet_status_breakdown():
+    return fleet_snapshot.status_breakdown()
+
+@router.get("/analytics/fleet/histogram", tags=["Analytics"])
+async def get_fleet_histogram(
+    metric: Metric = "speed",
+    bins: int = Query(20, ge=1, le=200),
+    min_value: Optional[float] = None,
+    max_value: Optional[float] = None
+):
+    value_range = None
+    if min_value is not None and max_value is not None:
+        if min_value >= max_value:
+            raise HTTPException(status_code=400, detail="min_value must be below max_value")
+        value_range = (min_value, max_value)
+    return fleet_snapshot.histogram(metric, bins, value_range)
+
+@router.get("/analytics/fleet/percentiles", tags=["Analytics"])
+async def get_fleet_percentiles(metric: Metric = "speed"):
+    return fleet_snapshot.percentiles(metric)
+
+@router.get("/analytics/fleet/low-fuel", tags=["Analytics"])
+async def get_low_fuel_vehicles(
+    threshold: float = Query(15.0, ge=0, le=100),
+    limit: int = Query(100, ge=1, le=10000)
+):
+    return fleet_snapshot.low_fuel(threshold, limit)
+
+@router.get("/analytics/fleet/heatmap", tags=["Analytics"])
+async def get_fleet_heatmap(
+    cell: float = Query(0.01, gt=0, le=10, description="Grid cell size in degrees"),
+    min_lat: Optional[float] = Query(None, ge=-90, le=90),
+    min_lng: Optional[float] = Query(None, ge=-180, le=180),
+    max_lat: Optional[float] = Query(None, ge=-90, le=90),
+    max_lng: Optional[float] = Query(None, ge=-180, le=180),
+    status: Optional[VehicleStatus] = None
+):
+    bounds = (min_lat, min_lng, max_lat, max_lng)
+    if all(b is None for b in bounds):
+        bounds = None
+    elif any(b is None for b in bounds):
+        raise HTTPException(status_code=400, detail="Pass all four bounds or none")
+    elif min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(status_code=400, detail="min bounds must not exceed max bounds")
+    return fleet_snapshot.heatmap(cell, bounds, status)
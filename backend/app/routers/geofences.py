@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from typing import List
+from datetime import timedelta
 from ..database import get_db_pool
 from ..models import Geofence
+from ..geofence_analytics import geofence_tracker
 
 router = APIRouter()
 
@@ -22,13 +24,19 @@ async def create_geofence(geofence: Geofence):
     if not pool:
         raise HTTPException(status_code=503, detail="Database not ready")
         
+    from ..geometry import fence_bounding_box
+
+    min_lat, min_lng, max_lat, max_lng = fence_bounding_box(geofence.model_dump())
     async with pool.acquire() as conn:
         row = await conn.fetchrow("""
-            INSERT INTO geofences (name, center_lat, center_lng, radius_meters, color)
-            VALUES ($1, $2, $3, $4, $5)
+            INSERT INTO geofences (name, shape, center_lat, center_lng, radius_meters, coordinates, buffer_meters,
+                                   min_lat, min_lng, max_lat, max_lng, color)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
             RETURNING *
-        """, geofence.name, geofence.center_lat, geofence.center_lng, geofence.radius_meters, geofence.color)
+        """, geofence.name, geofence.shape, geofence.center_lat, geofence.center_lng, geofence.radius_meters,
+            geofence.coordinates, geofence.buffer_meters, min_lat, min_lng, max_lat, max_lng, geofence.color)
         
+    geofence_tracker.add_fence(dict(row))
     return dict(row)
 
 @router.delete("/geofences/{geofence_id}", tags=["Geofences"])
@@ -43,4 +51,71 @@ async def delete_geofence(geofence_id: str):
     if result == "DELETE 0":
         raise HTTPException(status_code=404, detail="Geofence not found")
         
+    geofence_tracker.remove_fence(geofence_id)
     return {"status": "success", "id": geofence_id}
+
+@router.get("/geofences/occupancy", tags=["Geofences"])
+async def get_geofence_occupancy():
+    return geofence_tracker.occupancy()
+
+@router.get("/geofences/{geofence_id}/occupancy", tags=["Geofences"])
+async def get_single_geofence_occupancy(geofence_id: str):
+    result = geofence_tracker.occupancy(geofence_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Geofence not found")
+    return result[0]
+
+@router.get("/geofences/{geofence_id}/stats", tags=["Geofences"])
+async def get_geofence_stats(geofence_id: str, hours: int = Query(24, ge=1, le=720)):
+    pool = await get_db_pool()
+    if not pool:
+        raise HTTPException(status_code=503, detail="Database not ready")
+
+    query = """
+        SELECT bucket, enters, exits, dwell_seconds, max_dwell
+        FROM geofence_rollups
+        WHERE geofence_id = $1::uuid AND bucket > NOW() - $2::interval
+        ORDER BY bucket ASC;
+    """
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(query, geofence_id, timedelta(hours=hours))
+
+    # Merge persisted rollups with counters not yet flushed
+    buckets = {
+        row['bucket']: [row['enters'], row['exits'], row['dwell_seconds'], row['max_dwell']]
+        for row in rows
+    }
+    for bucket, counter in geofence_tracker.pending_stats(geofence_id).items():
+        merged = buckets.setdefault(bucket, [0, 0, 0.0, 0.0])
+        merged[0] += counter[0]
+        merged[1] += counter[1]
+        merged[2] += counter[2]
+        merged[3] = max(merged[3], counter[3])
+
+    return [
+        {
+            "hour": bucket.isoformat(),
+            "enters": int(c[0]),
+            "exits": int(c[1]),
+            "avg_dwell_seconds": round(c[2] / c[1], 1) if c[1] else 0,
+            "max_dwell_seconds": round(c[3], 1)
+        }
+        for bucket, c in sorted(buckets.items())
+    ]
+
+@router.get("/geofences/{geofence_id}/visits", tags=["Geofences"])
+async def get_geofence_visits(geofence_id: str, limit: int = Query(100, ge=1, le=1000)):
+    pool = await get_db_pool()
+    if not pool:
+        raise HTTPException(status_code=503, detail="Database not ready")
+
+    query = """
+        SELECT vehicle_id, entered_at, exited_at, dwell_seconds
+        FROM geofence_visits
+        WHERE geofence_id = $1::uuid
+        ORDER BY exited_at DESC
+        LIMIT $2;
+    """
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(query, geofence_id, limit)
+    return [dict(row) for row in rows]
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from ..database import get_pool_stats
+from ..spool import telemetry_spool
+from ..dedup import deduplicator
+
+router = APIRouter()
+
+@router.get("/system/db-pool", tags=["System"])
+async def get_db_pool_stats():
+    return get_pool_stats()
+
+@router.get("/system/ingest", tags=["System"])
+async def get_ingest_stats():
+    return {"spool": telemetry_spool.stats(), "dedup": deduplicator.stats()}
@@ -0,0 +1,132 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from datetime import datetime, timedelta
+from ..config import Config
+from ..database import get_db_pool
+from ..trips import segment_trips, INSERT_TRIP_SQL, TRIP_COLUMNS
+
+router = APIRouter()
+
+TRIPS_SQL = """
+    SELECT *
+    FROM trips
+    WHERE ($1::text IS NULL OR vehicle_id = $1)
+    AND ($2::timestamptz IS NULL OR start_time >= $2)
+    AND ($3::timestamptz IS NULL OR start_time <= $3)
+    ORDER BY start_time DESC
+    LIMIT $4;
+"""
+
+@router.get("/trips", tags=["Trips"])
+async def get_trips(
+    vehicle_id: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000)
+):
+    pool = await get_db_pool()
+    if not pool:
+        raise HTTPException(status_code=503, detail="Database not ready")
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(TRIPS_SQL, vehicle_id, start_time, end_time, limit)
+    return [dict(row) for row in rows]
+
+@router.get("/vehicles/{vehicle_id}/trips", tags=["Trips"])
+async def get_vehicle_trips(
+    vehicle_id: str,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000)
+):
+    return await get_trips(vehicle_id, start_time, end_time, limit)
+
+@router.get("/vehicles/{vehicle_id}/stops", tags=["Trips"])
+async def get_vehicle_stops(vehicle_id: str, start_time: datetime, end_time: datetime,
+                            limit: int = Query(100, ge=1, le=1000)):
+    # A stop is the interval between the end of one trip and the start of the next
+    query = """
+        SELECT end_time AS start_time, next_start AS end_time,
+               end_lat AS latitude, end_lng AS longitude,
+               EXTRACT(EPOCH FROM next_start - end_time) AS duration_seconds
+        FROM (
+            SELECT end_time, end_lat, end_lng,
+                   LEAD(start_time) OVER (ORDER BY start_time) AS next_start
+            FROM trips
+            WHERE vehicle_id = $1 AND start_time BETWEEN $2 AND $3
+        ) t
+        WHERE next_start IS NOT NULL
+        ORDER BY start_time DESC
+        LIMIT $4;
+    """
+    pool = await get_db_pool()
+    if not pool:
+        raise HTTPException(status_code=503, detail="Database not ready")
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(query, vehicle_id, start_time, end_time, limit)
+    return [dict(row) for row in rows]
+
+BACKFILL_VEHICLES_SQL = """
+    SELECT DISTINCT vehicle_id
+    FROM vehicle_telemetry
+    WHERE time BETWEEN $1 AND $2
+    AND ($3::text IS NULL OR vehicle_id = $3);
+"""
+
+# One row per vehicle with its history as arrays, so no per-row Python loop
+BACKFILL_HISTORY_SQL = """
+    SELECT array_agg(EXTRACT(EPOCH FROM time)::float8 ORDER BY time) AS ts,
+           array_agg(latitude ORDER BY time) AS latitude,
+           array_agg(longitude ORDER BY time) AS longitude,
+           array_agg(speed ORDER BY time) AS speed,
+           array_agg(fuel_level ORDER BY time) AS fuel_level,
+           array_agg(status ORDER BY time) AS status
+    FROM vehicle_telemetry
+    WHERE vehicle_id = $1 AND time BETWEEN $2 AND $3;
+"""
+
+@router.post("/trips/backfill", tags=["Trips"])
+async def backfill_trips(start_time: datetime, end_time: datetime, vehicle_id: Optional[str] = None):
+    """
+    Recompute trips lying entirely inside a time window from vehicle_telemetry,
+    replacing the stored ones. Telemetry is read with a margin on both sides
+    so trip boundaries near the window edges are found as the live segmenter
+    would find them; trips crossing an edge are left untouched.
+    """
+    if start_time >= end_time:
+        raise HTTPException(status_code=400, detail="start_time must be before end_time")
+    if end_time - start_time > timedelta(hours=Config.TRIP_BACKFILL_MAX_HOURS):
+        raise HTTPException(status_code=400, detail=f"window must not exceed {Config.TRIP_BACKFILL_MAX_HOURS:g} hours")
+    pool = await get_db_pool()
+    if not pool:
+        raise HTTPException(status_code=503, detail="Database not ready")
+
+    # Deciding whether a fix starts or ends a trip needs at most this much context
+    margin = timedelta(seconds=max(Config.TRIP_STOP_SECONDS, Config.TRIP_MAX_GAP))
+    window_start, window_end = start_time.timestamp(), end_time.timestamp()
+
+    trips = []
+    async with pool.acquire() as conn:
+        vehicle_ids = [row['vehicle_id'] for row in await conn.fetch(BACKFILL_VEHICLES_SQL, start_time, end_time, vehicle_id)]
+        for vid in vehicle_ids:
+            history = await conn.fetchrow(BACKFILL_HISTORY_SQL, vid, start_time - margin, end_time + margin)
+            if not history or not history['ts']:
+                continue
+            trips.extend(
+                trip for trip in segment_trips(
+                    vid, history['ts'], history['latitude'], history['longitude'],
+                    history['speed'], history['fuel_level'], history['status']
+                )
+                if trip['start_time'].timestamp() >= window_start and trip['end_time'].timestamp() <= window_end
+            )
+
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.execute("""
+                DELETE FROM trips
+                WHERE start_time >= $1 AND end_time <= $2
+                AND ($3::text IS NULL OR vehicle_id = $3)
+            """, start_time, end_time, vehicle_id)
+            if trips:
+                await conn.executemany(INSERT_TRIP_SQL, [tuple(t[c] for c in TRIP_COLUMNS) for t in trips])
+
+    return {"vehicles": len(vehicle_ids), "trips": len(trips)}
@@ -1,15 +1,14 @@
 from fastapi import APIRouter, HTTPException, Query
-from typing import List
-from datetime import datetime
+from typing import List, Optional
+from datetime import datetime, timedelta
 from ..database import get_db_pool
-from ..models import VehicleSummary
+from ..models import VehicleSummary, NearbyVehicle, BatchHistoryRequest, MAX_BATCH_VEHICLES
 from ..redis_manager import redis_manager
+from ..fleet_snapshot import VehicleStatus
 
 router = APIRouter()
 
-@router.get("/vehicles", response_model=List[VehicleSummary], tags=["Vehicles"])
-async def get_recent_vehicles():
-    vehicles = await redis_manager.get_all_vehicles()
+def _with_last_update(vehicles: List[dict]) -> List[dict]:
     # Map 'timestamp' to 'last_update' if needed, and handle type/field matching
     for v in vehicles:
         if 'timestamp' in v:
@@ -18,6 +17,36 @@ async def get_recent_vehicles():
         # RedisManager already converts speed/lat/lon to float.
     return vehicles
 
+@router.get("/vehicles", response_model=List[VehicleSummary], tags=["Vehicles"])
+async def get_recent_vehicles():
+    vehicles = await redis_manager.get_all_vehicles()
+    return _with_last_update(vehicles)
+
+@router.get("/vehicles/bbox", response_model=List[VehicleSummary], tags=["Vehicles"])
+async def get_vehicles_in_bbox(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    status: Optional[VehicleStatus] = None,
+    limit: Optional[int] = Query(None, ge=1, le=10000)
+):
+    if min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(status_code=400, detail="min bounds must not exceed max bounds")
+    vehicles = await redis_manager.get_vehicles_in_bbox(min_lat, min_lng, max_lat, max_lng, status=status, limit=limit)
+    return _with_last_update(vehicles)
+
+@router.get("/vehicles/nearest", response_model=List[NearbyVehicle], tags=["Vehicles"])
+async def get_nearest_vehicles(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=500),
+    status: Optional[VehicleStatus] = None,
+    radius_km: float = Query(50.0, gt=0, le=20000)
+):
+    vehicles = await redis_manager.get_nearest_vehicles(lat, lng, k=k, status=status, radius_km=radius_km)
+    return _with_last_update(vehicles)
+
 @router.get("/history/{vehicle_id}", tags=["Vehicles"])
 async def get_vehicle_history(vehicle_id: str):
     pool = await get_db_pool()
@@ -55,4 +84,91 @@ async def get_vehicle_route_history(vehicle_id: str, start_time: datetime, end_t
         rows = await conn.fetch(query, vehicle_id, start_time, end_time)
     
     # helper to convert row to dict and handle potential non-serializable types if any (datetime is usually fine in FastAPI)
-    return [dict(row) for row in rows]
\ No newline at end of file
+    return [dict(row) for row in rows]
+
+
+BATCH_HISTORY_SQL = """
+    SELECT vehicle_id, time, latitude, longitude, speed, fuel_level, status
+    FROM vehicle_telemetry
+    WHERE vehicle_id = ANY($1::text[])
+    AND time BETWEEN $2 AND $3
+    ORDER BY vehicle_id, time ASC;
+"""
+
+# One point per vehicle per step: last position/fuel/status, mean speed
+BATCH_HISTORY_DOWNSAMPLED_SQL = """
+    SELECT vehicle_id,
+           time_bucket($4::interval, time) AS time,
+           last(latitude, time) AS latitude,
+           last(longitude, time) AS longitude,
+           AVG(speed) AS speed,
+           last(fuel_level, time) AS fuel_level,
+           last(status, time) AS status
+    FROM vehicle_telemetry
+    WHERE vehicle_id = ANY($1::text[])
+    AND time BETWEEN $2 AND $3
+    GROUP BY vehicle_id, 2
+    ORDER BY vehicle_id, 2 ASC;
+"""
+
+@router.post("/history/batch", tags=["Vehicles"])
+async def get_batch_history(request: BatchHistoryRequest):
+    """
+    Route history for many vehicles in one query, returned column-oriented per
+    vehicle with `time` as epoch milliseconds. Geofence and bbox selections
+    include every vehicle that reported a position inside the (geofence's)
+    bounding box during the window.
+    """
+    pool = await get_db_pool()
+    if not pool:
+        raise HTTPException(status_code=503, detail="Database not ready")
+
+    async with pool.acquire() as conn:
+        vehicle_ids = request.vehicle_ids
+        if vehicle_ids is None:
+            bbox = request.bbox
+            if request.geofence_id is not None:
+                fence = await conn.fetchrow("SELECT * FROM geofences WHERE id = $1", request.geofence_id)
+                if not fence:
+                    raise HTTPException(status_code=404, detail="Geofence not found")
+                from ..geometry import fence_bounding_box
+                # Computed from the shape when the stored box has not been backfilled
+                bbox = list(fence_bounding_box(dict(fence)))
+            rows = await conn.fetch("""
+                SELECT DISTINCT vehicle_id
+                FROM vehicle_telemetry
+                WHERE time BETWEEN $1 AND $2
+                AND latitude BETWEEN $3 AND $5
+                AND longitude BETWEEN $4 AND $6
+                LIMIT $7;
+            """, request.start_time, request.end_time, *bbox, MAX_BATCH_VEHICLES)
+            vehicle_ids = [row['vehicle_id'] for row in rows]
+
+        if not vehicle_ids:
+            rows = []
+        elif request.step_seconds:
+            rows = await conn.fetch(BATCH_HISTORY_DOWNSAMPLED_SQL, vehicle_ids, request.start_time,
+                                    request.end_time, timedelta(seconds=request.step_seconds))
+        else:
+            rows = await conn.fetch(BATCH_HISTORY_SQL, vehicle_ids, request.start_time, request.end_time)
+
+    vehicles = {}
+    for row in rows:
+        cols = vehicles.get(row['vehicle_id'])
+        if cols is None:
+            cols = vehicles[row['vehicle_id']] = {
+                "time": [], "latitude": [], "longitude": [], "speed": [], "fuel_level": [], "status": []
+            }
+        cols["time"].append(int(row['time'].timestamp() * 1000))
+        cols["latitude"].append(row['latitude'])
+        cols["longitude"].append(row['longitude'])
+        cols["speed"].append(row['speed'])
+        cols["fuel_level"].append(row['fuel_level'])
+        cols["status"].append(row['status'])
+
+    return {
+        "start_time": request.start_time,
+        "end_time": request.end_time,
+        "step_seconds": request.step_seconds,
+        "vehicles": vehicles
+    }
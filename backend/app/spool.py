@@ -0,0 +1,194 @@
+import os
+import math
+import mmap
+import time
+import struct
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+from .config import Config
+from .database import get_ingest_pool, ingest_healthy
+
+logger = logging.getLogger(__name__)
+
+# Record layout: u32 body length, then time, lat, lng, speed, fuel, temp,
+# heading as float64 (NaN for missing), u8 id length, u8 status length,
+# followed by the utf-8 id and status. A zero length marks the end of data
+# in a pre-allocated (zero-filled) segment.
+LENGTH = struct.Struct("<I")
+FIXED = struct.Struct("<7dBB")
+SEGMENT_SUFFIX = ".seg"
+
+COPY_COLUMNS = ["time", "vehicle_id", "latitude", "longitude", "speed", "fuel_level", "engine_temp", "heading", "status"]
+
+def _num(value) -> float:
+    return float("nan") if value is None else float(value)
+
+def _opt(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+def encode_record(data: dict) -> bytes:
+    vehicle_id = str(data['vehicle_id']).encode()[:255]
+    status = (data.get('status') or "").encode()[:255]
+    body = FIXED.pack(
+        data['timestamp'].timestamp(), float(data['latitude']), float(data['longitude']), float(data['speed']),
+        _num(data.get('fuel_level')), _num(data.get('engine_temp')), _num(data.get('heading')),
+        len(vehicle_id), len(status)
+    ) + vehicle_id + status
+    return LENGTH.pack(len(body)) + body
+
+def decode_records(buf, offset: int = 0) -> Iterator[Tuple[int, tuple]]:
+    """Yield (next_offset, record) with records in COPY_COLUMNS order."""
+    end = len(buf)
+    while offset + LENGTH.size <= end:
+        (length,) = LENGTH.unpack_from(buf, offset)
+        if length == 0 or offset + LENGTH.size + length > end:
+            return
+        start = offset + LENGTH.size
+        ts, lat, lng, speed, fuel, temp, heading, id_len, status_len = FIXED.unpack_from(buf, start)
+        pos = start + FIXED.size
+        vehicle_id = bytes(buf[pos:pos + id_len]).decode()
+        status = bytes(buf[pos + id_len:pos + id_len + status_len]).decode() or None
+        offset = start + length
+        yield offset, (
+            datetime.fromtimestamp(ts, tz=timezone.utc), vehicle_id, lat, lng, speed,
+            _opt(fuel), _opt(temp), _opt(heading), status
+        )
+
+class TelemetrySpool:
+    """
+    Append-only on-disk spool of telemetry rows, written to memory-mapped,
+    pre-allocated segment files. Segments are replayed in order into
+    vehicle_telemetry with COPY, so rows for a vehicle land in arrival order.
+    """
+
+    def __init__(self, directory: str = Config.SPOOL_DIR, segment_bytes: int = Config.SPOOL_SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._path: Optional[str] = None
+        self._offset = 0
+        self._next_seq: Optional[int] = None
+        # Replay progress within the oldest segment, so a failed batch is not re-sent
+        self._replay_path: Optional[str] = None
+        self._replay_offset = 0
+        self.spooled = 0
+        self.replayed = 0
+
+    def _segments(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory) if name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def sealed_segments(self) -> List[str]:
+        return [path for path in self._segments() if path != self._path]
+
+    def _open_segment(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if self._next_seq is None:
+            existing = self._segments()
+            self._next_seq = int(os.path.basename(existing[-1])[:-len(SEGMENT_SUFFIX)]) + 1 if existing else 0
+        self._path = os.path.join(self.directory, f"{self._next_seq:012d}{SEGMENT_SUFFIX}")
+        self._next_seq += 1
+        self._file = open(self._path, "w+b")
+        self._file.truncate(self.segment_bytes)
+        self._map = mmap.mmap(self._file.fileno(), self.segment_bytes)
+        self._offset = 0
+
+    def seal(self):
+        """Close the active segment so it becomes eligible for replay."""
+        if self._map is None:
+            return
+        self._map.flush()
+        self._map.close()
+        # Drop the unused pre-allocated tail
+        self._file.truncate(self._offset)
+        self._file.close()
+        self._map = None
+        self._file = None
+        self._path = None
+
+    def append(self, data: dict):
+        record = encode_record(data)
+        if len(record) + LENGTH.size > self.segment_bytes:
+            raise ValueError("record larger than spool segment")
+        if self._map is not None and self._offset + len(record) + LENGTH.size > self.segment_bytes:
+            self.seal()
+        if self._map is None:
+            self._open_segment()
+        self._map[self._offset:self._offset + len(record)] = record
+        self._offset += len(record)
+        self.spooled += 1
+
+    def stats(self) -> dict:
+        sealed = self.sealed_segments()
+        active = self._offset if self._map is not None else 0
+        return {
+            "segments_pending": len(sealed) + (1 if active else 0),
+            "bytes_pending": sum(os.path.getsize(p) for p in sealed) + active - self._replay_offset,
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+        }
+
+    async def replay(self):
+        """Bulk-load spooled segments, oldest first, at most SPOOL_REPLAY_RATE rows/s."""
+        # Wait for the health check to see the ingest pool recover
+        if not ingest_healthy():
+            return
+        for path in self.sealed_segments():
+            if not await self._replay_segment(path):
+                return
+            self._finish(path)
+        # Caught up on sealed segments: drain the active one as well. If the
+        # database is still down this leaves a single sealed segment behind.
+        if self._map is not None and self._offset:
+            path = self._path
+            self.seal()
+            if await self._replay_segment(path):
+                self._finish(path)
+
+    def _finish(self, path: str):
+        os.remove(path)
+        self._replay_path, self._replay_offset = None, 0
+
+    async def _replay_segment(self, path: str) -> bool:
+        if path != self._replay_path:
+            self._replay_path, self._replay_offset = path, 0
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return True
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                records = decode_records(buf, self._replay_offset)
+                while True:
+                    batch, next_offset = [], self._replay_offset
+                    for next_offset, record in records:
+                        batch.append(record)
+                        if len(batch) >= Config.SPOOL_REPLAY_BATCH:
+                            break
+                    if not batch:
+                        return True
+                    started = time.monotonic()
+                    try:
+                        pool = await get_ingest_pool()
+                        async with pool.acquire() as conn:
+                            await conn.copy_records_to_table("vehicle_telemetry", records=batch, columns=COPY_COLUMNS)
+                    except Exception as e:
+                        logger.warning(f"Spool replay paused, database unavailable: {e}")
+                        return False
+                    self._replay_offset = next_offset
+                    self.replayed += len(batch)
+                    # Rate limit so recovery does not flood the database
+                    delay = len(batch) / Config.SPOOL_REPLAY_RATE - (time.monotonic() - started)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+    def close(self):
+        self.seal()
+
+telemetry_spool = TelemetrySpool()
@@ -0,0 +1,33 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+_tasks: Dict[str, asyncio.Task] = {}
+
+async def _run_periodic(name: str, interval: float, fn: Callable[[], Awaitable[None]]):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await fn()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Background task {name} failed: {e}")
+
+def start_periodic(name: str, interval: float, fn: Callable[[], Awaitable[None]]):
+    """Run `fn` every `interval` seconds on the current event loop until stopped."""
+    if name in _tasks and not _tasks[name].done():
+        return _tasks[name]
+    task = asyncio.get_event_loop().create_task(_run_periodic(name, interval, fn))
+    _tasks[name] = task
+    return task
+
+async def stop_all():
+    tasks = list(_tasks.values())
+    _tasks.clear()
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
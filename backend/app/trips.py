@@ -0,0 +1,203 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from .config import Config
+from .database import get_ingest_pool
+from .geodesy import haversine_m
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING_TRIPS = 10000
+
+TRIP_COLUMNS = [
+    "vehicle_id", "start_time", "end_time", "start_lat", "start_lng", "end_lat", "end_lng",
+    "distance_km", "duration_seconds", "idle_seconds", "fuel_used", "max_speed", "avg_speed",
+]
+
+INSERT_TRIP_SQL = f"""
+    INSERT INTO trips ({", ".join(TRIP_COLUMNS)})
+    VALUES ({", ".join(f"${i}" for i in range(1, len(TRIP_COLUMNS) + 1))})
+"""
+
+def is_moving(speed: float, status: Optional[str]) -> bool:
+    return status == "moving" or (speed or 0.0) >= Config.TRIP_MIN_SPEED
+
+def trip_record(vehicle_id: str, start_ts: float, end_ts: float, start_pos: Tuple[float, float],
+                end_pos: Tuple[float, float], distance_m: float, idle_s: float, fuel_used: float,
+                max_speed: float) -> dict:
+    duration = end_ts - start_ts
+    distance_km = distance_m / 1000.0
+    return {
+        "vehicle_id": vehicle_id,
+        "start_time": datetime.fromtimestamp(start_ts, tz=timezone.utc),
+        "end_time": datetime.fromtimestamp(end_ts, tz=timezone.utc),
+        "start_lat": start_pos[0],
+        "start_lng": start_pos[1],
+        "end_lat": end_pos[0],
+        "end_lng": end_pos[1],
+        "distance_km": round(distance_km, 3),
+        "duration_seconds": round(duration, 1),
+        "idle_seconds": round(idle_s, 1),
+        "fuel_used": round(fuel_used, 2),
+        "max_speed": round(float(max_speed), 1),
+        "avg_speed": round(distance_km / (duration / 3600.0), 1) if duration > 0 else 0.0,
+    }
+
+class ActiveTrip:
+    """
+    An open trip. Totals are committed at each moving fix; distance, idle
+    time and fuel seen since the last moving fix stay pending, so a trip
+    that ends in a stop is cut at the moment the vehicle stopped.
+    """
+
+    __slots__ = ("start_ts", "start_pos", "end_ts", "end_pos", "distance_m", "idle_s", "fuel_used",
+                 "max_speed", "pending_distance", "pending_idle", "pending_fuel")
+
+    def __init__(self, ts: float, pos: Tuple[float, float], speed: float):
+        self.start_ts = self.end_ts = ts
+        self.start_pos = self.end_pos = pos
+        self.distance_m = self.idle_s = self.fuel_used = 0.0
+        self.max_speed = speed
+        self.pending_distance = self.pending_idle = self.pending_fuel = 0.0
+
+    def commit(self, ts: float, pos: Tuple[float, float], speed: float):
+        self.end_ts, self.end_pos = ts, pos
+        self.distance_m += self.pending_distance
+        self.idle_s += self.pending_idle
+        self.fuel_used += self.pending_fuel
+        self.pending_distance = self.pending_idle = self.pending_fuel = 0.0
+        self.max_speed = max(self.max_speed, speed)
+
+class TripSegmenter:
+    """
+    Incremental per-vehicle trip state machine fed by the ingest stream.
+    A trip starts at the first moving fix and ends once the vehicle has been
+    stationary for TRIP_STOP_SECONDS or telemetry has a gap longer than
+    TRIP_MAX_GAP. Completed trips are written to `trips` in batches.
+    """
+
+    def __init__(self):
+        self.active: Dict[str, ActiveTrip] = {}
+        # vehicle_id -> (ts, lat, lng, fuel) of the previous fix
+        self.last_fix: Dict[str, Tuple[float, float, float, Optional[float]]] = {}
+        self.pending: List[dict] = []
+
+    def process(self, payload: dict):
+        vehicle_id = payload['vehicle_id']
+        ts = payload['timestamp'].timestamp()
+        pos = (payload['latitude'], payload['longitude'])
+        speed = payload.get('speed') or 0.0
+        fuel = payload.get('fuel_level')
+        moving = is_moving(speed, payload.get('status'))
+
+        prev = self.last_fix.get(vehicle_id)
+        if prev is not None and ts <= prev[0]:
+            return
+        self.last_fix[vehicle_id] = (ts, pos[0], pos[1], fuel)
+
+        trip = self.active.get(vehicle_id)
+        if trip is not None:
+            dt = ts - prev[0]
+            if dt > Config.TRIP_MAX_GAP:
+                self._close(vehicle_id)
+                trip = None
+            else:
+                trip.pending_distance += haversine_m(prev[1], prev[2], pos[0], pos[1])
+                if fuel is not None and prev[3] is not None:
+                    trip.pending_fuel += max(prev[3] - fuel, 0.0)
+                if not moving:
+                    trip.pending_idle += dt
+
+        if trip is None:
+            if moving:
+                self.active[vehicle_id] = ActiveTrip(ts, pos, speed)
+        elif moving:
+            trip.commit(ts, pos, speed)
+        elif ts - trip.end_ts >= Config.TRIP_STOP_SECONDS:
+            self._close(vehicle_id)
+
+    def _close(self, vehicle_id: str):
+        trip = self.active.pop(vehicle_id)
+        if trip.distance_m / 1000.0 < Config.TRIP_MIN_DISTANCE_KM:
+            return
+        self.pending.append(trip_record(
+            vehicle_id, trip.start_ts, trip.end_ts, trip.start_pos, trip.end_pos,
+            trip.distance_m, trip.idle_s, trip.fuel_used, trip.max_speed
+        ))
+
+    def forget(self, vehicle_id: str):
+        if vehicle_id in self.active:
+            self._close(vehicle_id)
+        self.last_fix.pop(vehicle_id, None)
+
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        try:
+            pool = await get_ingest_pool()
+            async with pool.acquire() as conn:
+                await conn.executemany(INSERT_TRIP_SQL, [tuple(t[c] for c in TRIP_COLUMNS) for t in batch])
+        except Exception as e:
+            logger.error(f"Trip flush failed: {e}")
+            self.pending = (batch + self.pending)[-MAX_PENDING_TRIPS:]
+
+def segment_trips(vehicle_id: str, times, lats, lngs, speeds, fuels, statuses) -> List[dict]:
+    """
+    Batch equivalent of TripSegmenter for one vehicle's time-ordered history.
+    Trip boundaries and per-trip totals are computed with array operations
+    (cumulative sums and reduceat) instead of a per-row state machine.
+    """
+    import numpy as np
+    from . import geometry
+
+    times = np.asarray(times, dtype=np.float64)
+    n = times.size
+    if n == 0:
+        return []
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    speeds = np.nan_to_num(np.asarray(speeds, dtype=np.float64))
+    fuels = np.asarray(fuels, dtype=np.float64)
+    moving = (speeds >= Config.TRIP_MIN_SPEED) | (np.asarray(statuses, dtype=object) == "moving")
+
+    moving_idx = np.flatnonzero(moving)
+    if moving_idx.size == 0:
+        return []
+
+    # Per-step quantities; step k is the move from fix k-1 to fix k
+    dt = np.diff(times, prepend=times[0])
+    step_dist = np.zeros(n)
+    step_dist[1:] = geometry.haversine_m(lats[:-1], lngs[:-1], lats[1:], lngs[1:])
+    step_fuel = np.zeros(n)
+    step_fuel[1:] = np.nan_to_num(np.clip(fuels[:-1] - fuels[1:], 0.0, None))
+    step_idle = np.where(moving, 0.0, dt)
+    cum_dist, cum_idle, cum_fuel = np.cumsum(step_dist), np.cumsum(step_idle), np.cumsum(step_fuel)
+    cum_gaps = np.cumsum(dt > Config.TRIP_MAX_GAP)
+
+    # Consecutive moving fixes belong to different trips when a long enough
+    # stationary run or a telemetry gap lies between them
+    prev_m, next_m = moving_idx[:-1], moving_idx[1:]
+    stopped = (next_m - 1 > prev_m) & (times[next_m - 1] - times[prev_m] >= Config.TRIP_STOP_SECONDS)
+    gapped = cum_gaps[next_m] > cum_gaps[prev_m]
+    breaks = stopped | gapped
+    starts = np.concatenate(([moving_idx[0]], next_m[breaks]))
+    ends = np.concatenate((prev_m[breaks], [moving_idx[-1]]))
+
+    distance = cum_dist[ends] - cum_dist[starts]
+    idle = cum_idle[ends] - cum_idle[starts]
+    fuel_used = cum_fuel[ends] - cum_fuel[starts]
+    bounds = np.empty(starts.size * 2, dtype=np.int64)
+    bounds[0::2], bounds[1::2] = starts, ends + 1
+    max_speed = np.maximum.reduceat(np.append(speeds, 0.0), bounds)[0::2]
+
+    keep = distance / 1000.0 >= Config.TRIP_MIN_DISTANCE_KM
+    return [
+        trip_record(
+            vehicle_id, times[s], times[e], (lats[s], lngs[s]), (lats[e], lngs[e]),
+            distance[k], idle[k], fuel_used[k], max_speed[k]
+        )
+        for k, (s, e) in enumerate(zip(starts, ends)) if keep[k]
+    ]
+
+trip_segmenter = TripSegmenter()
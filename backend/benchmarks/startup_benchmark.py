@@ -0,0 +1,73 @@
+"""
+Startup benchmark for the API.
+
+Reports the import time of `main` in a fresh interpreter and the
+time-to-first-request of a uvicorn process (spawn until `GET /` returns 200).
+The second measurement needs the usual DATABASE_URL / REDIS_URL / MQTT_BROKER
+services to be reachable, e.g. via `docker-compose up timescaledb redis mosquitto`.
+
+    cd backend
+    python benchmarks/startup_benchmark.py --runs 5
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def measure_import() -> float:
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR,
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+def measure_first_request(timeout: float) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup (are the backing services running?)")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/", timeout=0.5).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            time.sleep(0.01)
+        raise TimeoutError(f"no response within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+def report(name: str, samples):
+    ms = [s * 1000 for s in samples]
+    print(f"{name:<24} median {statistics.median(ms):8.1f} ms   min {min(ms):8.1f} ms   max {max(ms):8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--import-only", action="store_true", help="skip the uvicorn time-to-first-request runs")
+    args = parser.parse_args()
+
+    report("import main", [measure_import() for _ in range(args.runs)])
+    if not args.import_only:
+        report("time to first request", [measure_first_request(args.timeout) for _ in range(args.runs)])
+
+if __name__ == "__main__":
+    main()
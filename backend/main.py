@@ -2,10 +2,18 @@ import asyncio
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import init_db, close_db_pool
+from app.config import Config
+from app.database import init_db, open_db_pools, close_db_pool, check_pools_health
 from app.mqtt_service import start_mqtt
 from app.redis_manager import redis_manager
-from app.routers import vehicles, analytics, geofences
+from app.routers import vehicles, analytics, geofences, alerts, trips, system
+from app import tasks
+from app.geofence_analytics import geofence_tracker
+from app.alerts import alert_engine
+from app.spool import telemetry_spool
+from app.dedup import deduplicator
+from app.trips import trip_segmenter
+from app.fleet_snapshot import fleet_snapshot
 
 # Logging
 logging.basicConfig(level=logging.INFO)
@@ -26,15 +34,66 @@ app.add_middleware(
 app.include_router(vehicles.router)
 app.include_router(analytics.router)
 app.include_router(geofences.router)
+app.include_router(alerts.router)
+app.include_router(trips.router)
+app.include_router(system.router)
 
-@app.on_event("startup")
-async def startup_event():
+async def init_database():
     await init_db()
+    try:
+        await geofence_tracker.load()
+    except Exception as e:
+        logger.warning(f"Could not load geofences for tracking: {e}")
+
+async def connect_redis():
     await redis_manager.connect()
-    start_mqtt(asyncio.get_event_loop())
+    # Seed the in-memory fleet arrays with vehicles still live in Redis
+    fleet_snapshot.load(await redis_manager.get_all_vehicles())
+
+async def start_ingest(loop):
+    # Pools exist before the first fix arrives; if the database is down the
+    # fixes are spooled and the pools are created by the first later write.
+    try:
+        await open_db_pools()
+    except Exception as e:
+        logger.warning(f"Could not open database pools before MQTT: {e}")
+    await asyncio.to_thread(start_mqtt, loop)
+
+@app.on_event("startup")
+async def startup_event():
+    # DB, Redis and MQTT come up concurrently; MQTT waits only for the pools,
+    # not for migrations. Fixes that arrive before the tables exist fall back
+    # to the telemetry spool.
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(
+        init_database(),
+        connect_redis(),
+        start_ingest(loop),
+    )
+    tasks.start_periodic("db-health", Config.DB_HEALTH_CHECK_INTERVAL, check_pools_health)
+    tasks.start_periodic("geofence-flush", Config.GEOFENCE_FLUSH_INTERVAL, geofence_tracker.flush)
+    tasks.start_periodic("alert-engine", Config.ALERT_FLUSH_INTERVAL, alert_engine.run)
+    tasks.start_periodic("offline-sweep", Config.OFFLINE_SWEEP_INTERVAL, sweep_vehicles)
+    tasks.start_periodic("trip-flush", Config.TRIP_FLUSH_INTERVAL, trip_segmenter.flush)
+    tasks.start_periodic("spool-replay", Config.SPOOL_REPLAY_INTERVAL, telemetry_spool.replay)
+
+async def sweep_vehicles():
+    offline_ids, expired_ids = await redis_manager.sweep_stale_vehicles()
+    fleet_snapshot.mark_offline(offline_ids)
+    fleet_snapshot.remove(expired_ids)
+    for vehicle_id in expired_ids:
+        deduplicator.forget(vehicle_id)
+        alert_engine.forget(vehicle_id)
+        geofence_tracker.forget(vehicle_id)
+        trip_segmenter.forget(vehicle_id)
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await tasks.stop_all()
+    await geofence_tracker.flush()
+    await alert_engine.flush()
+    await trip_segmenter.flush()
+    telemetry_spool.close()
     await close_db_pool()
     await redis_manager.close()
 
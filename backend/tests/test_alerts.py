@@ -0,0 +1,73 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from app.alerts import AlertEngine
+from app.config import Config
+
+T0 = datetime(2024, 1, 1, 12, 0, 0)
+
+def telemetry(offset_s=0, **overrides):
+    payload = {
+        "vehicle_id": "v1", "speed": 50.0, "fuel_level": 60.0, "engine_temp": 90.0,
+        "timestamp": T0 + timedelta(seconds=offset_s),
+    }
+    payload.update(overrides)
+    return payload
+
+def test_speeding_is_deduplicated_while_condition_holds():
+    engine = AlertEngine()
+    for i in range(5):
+        engine.process(telemetry(i, speed=150.0))
+    assert [a["type"] for a in engine.pending] == ["speeding"]
+    assert engine.active_count() == 1
+
+    engine.process(telemetry(10, speed=60.0))
+    assert engine.active_count() == 0
+
+def test_cooldown_suppresses_flapping_alerts():
+    engine = AlertEngine()
+    engine.process(telemetry(0, engine_temp=110.0))
+    engine.process(telemetry(1, engine_temp=90.0))
+    engine.process(telemetry(2, engine_temp=110.0))
+    assert len(engine.pending) == 1
+    assert engine.suppressed == 1
+
+def test_sudden_fuel_drop_within_window():
+    engine = AlertEngine()
+    engine.process(telemetry(0, fuel_level=60.0))
+    engine.process(telemetry(60, fuel_level=58.0))
+    assert not engine.pending
+    engine.process(telemetry(120, fuel_level=45.0))
+    assert engine.pending[0]["type"] == "fuel_drop"
+    assert engine.pending[0]["value"] == 15.0
+
+def test_fuel_drop_outside_window_is_ignored():
+    engine = AlertEngine()
+    engine.process(telemetry(0, fuel_level=60.0))
+    engine.process(telemetry(Config.ALERT_FUEL_DROP_WINDOW + 60, fuel_level=45.0))
+    assert not engine.pending
+
+def test_offline_sweep_only_flags_silent_vehicles():
+    engine = AlertEngine()
+    with patch("app.alerts.time.monotonic", return_value=1000.0):
+        engine.process(telemetry(0))
+    with patch("app.alerts.time.monotonic", return_value=1000.0 + Config.VEHICLE_OFFLINE_AFTER - 1):
+        engine.process(telemetry(1, vehicle_id="v2"))
+    with patch("app.alerts.time.monotonic", return_value=1000.0 + Config.VEHICLE_OFFLINE_AFTER + 1):
+        engine.sweep_offline()
+    assert [(a["vehicle_id"], a["type"]) for a in engine.pending] == [("v1", "offline")]
+    assert engine.pending[0]["timestamp"].tzinfo is not None
+
+def test_forget_clears_offline_alert_and_vehicle_state():
+    engine = AlertEngine()
+    with patch("app.alerts.time.monotonic", return_value=1000.0):
+        engine.process(telemetry(0, speed=Config.ALERT_SPEED_LIMIT + 10))
+    with patch("app.alerts.time.monotonic", return_value=1000.0 + Config.VEHICLE_OFFLINE_AFTER + 1):
+        engine.sweep_offline()
+    assert engine.active_count() == 2
+    engine.forget("v1")
+    assert engine.active_count() == 0
+    assert not engine.windows and not engine.last_raised and not engine.last_seen
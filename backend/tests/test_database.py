@@ -0,0 +1,49 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from app import database
+
+def mock_pool(conn):
+    cm = MagicMock()
+    cm.__aenter__ = AsyncMock(return_value=conn)
+    cm.__aexit__ = AsyncMock(return_value=None)
+    pool = MagicMock()
+    pool.acquire.return_value = cm
+    return pool
+
+def test_init_db_skips_migrations_when_schema_is_current():
+    conn = AsyncMock()
+    conn.fetchval.return_value = database.SCHEMA_VERSION
+    with patch("app.database.get_db_pool", AsyncMock(return_value=mock_pool(conn))):
+        asyncio.run(database.init_db())
+    conn.execute.assert_not_awaited()
+
+def test_init_db_migrates_and_records_version():
+    conn = AsyncMock()
+    conn.fetchval.side_effect = Exception("relation \"schema_meta\" does not exist")
+    with patch("app.database.get_db_pool", AsyncMock(return_value=mock_pool(conn))):
+        asyncio.run(database.init_db())
+    last_call = conn.execute.await_args_list[-1]
+    assert "schema_meta" in last_call.args[0]
+    assert last_call.args[1] == database.SCHEMA_VERSION
+
+def test_concurrent_first_callers_share_one_pool():
+    created = []
+
+    async def slow_create(name):
+        created.append(name)
+        await asyncio.sleep(0.01)
+        return MagicMock(name=f"{name}-pool")
+
+    async def scenario():
+        with patch("app.database._create_pool", slow_create), \
+             patch.object(database, "_pool_locks", {"query": asyncio.Lock(), "ingest": asyncio.Lock()}), \
+             patch.object(database, "ingest_pool", None), patch.object(database, "db_pool", None):
+            pools = await asyncio.gather(*[database.get_ingest_pool() for _ in range(20)], database.open_db_pools())
+            assert all(p is pools[0] for p in pools[:20])
+
+    asyncio.run(scenario())
+    assert sorted(created) == ["ingest", "query"]
@@ -0,0 +1,45 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.dedup import TelemetryDeduplicator, DUPLICATE, FRESH, LATE
+
+T0 = datetime(2024, 1, 1, 12, 0, 0)
+
+def test_classifies_fresh_late_and_duplicate():
+    dedup = TelemetryDeduplicator(window=4)
+    assert dedup.classify("v1", T0) == FRESH
+    assert dedup.classify("v1", T0 + timedelta(seconds=2)) == FRESH
+    assert dedup.classify("v1", T0 + timedelta(seconds=2)) == DUPLICATE
+    assert dedup.classify("v1", T0 + timedelta(seconds=1)) == LATE
+    assert dedup.classify("v1", T0 + timedelta(seconds=1)) == DUPLICATE
+    assert dedup.classify("v2", T0) == FRESH
+    assert dedup.stats() == {"fresh": 3, "late": 1, "duplicates": 2, "tracked_vehicles": 2}
+
+def test_recent_window_is_bounded():
+    dedup = TelemetryDeduplicator(window=2)
+    for i in range(10):
+        dedup.classify("v1", T0 + timedelta(seconds=i))
+    assert len(dedup.recent["v1"].times) == 2
+    assert dedup.classify("v1", T0 + timedelta(seconds=9)) == DUPLICATE
+    # Evicted from the ring: no longer recognised as a resend
+    assert dedup.classify("v1", T0 + timedelta(seconds=7)) == LATE
+
+def test_process_message_routes_late_fixes_to_history_only():
+    from app import mqtt_service
+
+    payload = {"vehicle_id": "v9", "latitude": 51.5, "longitude": -0.1, "speed": 10.0, "timestamp": T0}
+    redis = MagicMock()
+    redis.update_vehicle_state = AsyncMock()
+    with patch.object(mqtt_service, "deduplicator", TelemetryDeduplicator()), \
+         patch.object(mqtt_service, "persist_telemetry", AsyncMock()) as persist, \
+         patch.object(mqtt_service, "redis_manager", redis):
+        asyncio.run(mqtt_service.process_message(dict(payload, timestamp=T0 + timedelta(seconds=5))))
+        asyncio.run(mqtt_service.process_message(dict(payload, timestamp=T0 + timedelta(seconds=5))))
+        asyncio.run(mqtt_service.process_message(dict(payload)))
+
+    assert persist.await_count == 2
+    assert redis.update_vehicle_state.await_count == 1
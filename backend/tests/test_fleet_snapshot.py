@@ -0,0 +1,79 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from app.fleet_snapshot import FleetSnapshot
+
+def fix(lat, lng, speed, fuel, status, temp=90.0):
+    return {"latitude": lat, "longitude": lng, "speed": speed, "fuel_level": fuel, "engine_temp": temp, "status": status}
+
+def make_snapshot():
+    snapshot = FleetSnapshot(capacity=2)
+    snapshot.update("v1", fix(51.501, -0.101, 40.0, 80.0, "moving"))
+    snapshot.update("v2", fix(51.502, -0.102, 60.0, 10.0, "moving"))
+    snapshot.update("v3", fix(51.555, -0.155, 0.0, 5.0, "idle"))
+    snapshot.update("v4", fix(51.503, -0.103, 0.0, None, "offline"))
+    return snapshot
+
+def test_grows_and_updates_in_place():
+    snapshot = make_snapshot()
+    assert snapshot.size == 4 and snapshot.capacity == 4
+    snapshot.update("v1", fix(51.6, -0.2, 50.0, 79.0, "moving"))
+    assert snapshot.size == 4
+    assert snapshot.column("speed")[snapshot.slots["v1"]] == 50.0
+
+def test_remove_keeps_rows_dense():
+    snapshot = make_snapshot()
+    snapshot.remove(["v1", "missing"])
+    assert snapshot.size == 3
+    assert sorted(snapshot.ids) == ["v2", "v3", "v4"]
+    for vehicle_id, slot in snapshot.slots.items():
+        assert snapshot.ids[slot] == vehicle_id
+    assert snapshot.column("speed")[snapshot.slots["v2"]] == 60.0
+    assert snapshot.codes()[snapshot.slots["v4"]] == 2
+
+def test_summary_matches_dashboard_stats():
+    snapshot = make_snapshot()
+    snapshot.mark_offline(["v3"])
+    assert snapshot.summary() == {
+        "total_vehicles": 4, "active_vehicles": 2, "idle_vehicles": 0, "offline_vehicles": 2, "avg_speed": 50.0,
+    }
+
+def test_status_breakdown_skips_missing_values():
+    breakdown = {row["status"]: row for row in make_snapshot().status_breakdown()}
+    assert breakdown["moving"]["count"] == 2
+    assert breakdown["moving"]["avg_fuel_level"] == 45.0
+    assert breakdown["offline"]["avg_fuel_level"] is None
+    assert breakdown["idle"]["share"] == 25.0
+
+def test_histogram_and_percentiles():
+    snapshot = make_snapshot()
+    histogram = snapshot.histogram("fuel_level", bins=2, value_range=(0, 100))
+    assert histogram["counts"] == [2, 1]
+    stats = snapshot.percentiles("speed")
+    assert stats["count"] == 4 and stats["max"] == 60.0
+    assert stats["p50"] == float(np.percentile([40, 60, 0, 0], 50))
+
+def test_low_fuel_sorted_and_limited():
+    snapshot = make_snapshot()
+    assert [v["vehicle_id"] for v in snapshot.low_fuel(20.0)] == ["v3", "v2"]
+    assert [v["vehicle_id"] for v in snapshot.low_fuel(20.0, limit=1)] == ["v3"]
+
+def test_heatmap_counts_cells():
+    snapshot = make_snapshot()
+    cells = snapshot.heatmap(0.01)
+    assert sum(c["count"] for c in cells) == 4
+    assert max(c["count"] for c in cells) == 3
+    assert snapshot.heatmap(0.01, bounds=(51.55, -0.16, 51.56, -0.15)) == [
+        {"latitude": 51.55, "longitude": -0.16, "count": 1}
+    ]
+    assert sum(c["count"] for c in snapshot.heatmap(0.01, status="moving")) == 2
+
+def test_empty_snapshot():
+    snapshot = FleetSnapshot()
+    assert snapshot.status_breakdown() == []
+    assert snapshot.histogram("speed")["counts"] == []
+    assert snapshot.percentiles("speed") == {"metric": "speed", "count": 0}
+    assert snapshot.low_fuel(20.0) == []
+    assert snapshot.heatmap(0.01) == []
@@ -0,0 +1,66 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+from app.geofence_analytics import GeofenceTracker, hour_bucket, MAX_PENDING_VISITS
+
+FENCE = {
+    "id": "123e4567-e89b-12d3-a456-426614174000",
+    "name": "Depot",
+    "center_lat": 51.5,
+    "center_lng": -0.1,
+    "radius_meters": 200.0,
+}
+
+def make_tracker():
+    tracker = GeofenceTracker()
+    tracker.add_fence(dict(FENCE))
+    return tracker
+
+def test_enter_and_exit_records_dwell():
+    tracker = make_tracker()
+    t0 = datetime(2024, 1, 1, 10, 15)
+    tracker.process("v1", 52.0, -0.1, t0)  # outside
+    tracker.process("v1", 51.5, -0.1, t0 + timedelta(minutes=1))  # enter
+    assert tracker.occupancy()[0]["vehicle_count"] == 1
+
+    tracker.process("v1", 51.5005, -0.1, t0 + timedelta(minutes=5))  # still inside
+    tracker.process("v1", 52.0, -0.1, t0 + timedelta(minutes=11))  # exit
+
+    assert tracker.occupancy()[0]["vehicle_count"] == 0
+    counter = tracker.pending[(FENCE["id"], hour_bucket(t0))]
+    assert counter[0] == 1 and counter[1] == 1
+    assert counter[2] == 600.0
+    assert len(tracker.pending_visits) == 1
+
+def test_remove_fence_clears_occupants():
+    tracker = make_tracker()
+    tracker.process("v1", 51.5, -0.1, datetime(2024, 1, 1, 10, 0))
+    tracker.remove_fence(FENCE["id"])
+    assert tracker.occupancy() == []
+    assert "v1" not in tracker.inside
+
+def test_forget_closes_open_visit_at_last_fix():
+    tracker = make_tracker()
+    t0 = datetime(2024, 1, 1, 10, 0)
+    tracker.process("v2", 52.0, -0.1, t0)  # never inside, so not tracked
+    tracker.process("v1", 51.5, -0.1, t0)
+    tracker.process("v1", 51.5, -0.1, t0 + timedelta(minutes=3))
+    assert set(tracker.inside) == {"v1"}
+
+    tracker.forget("v1")
+    assert tracker.occupancy()[0]["vehicle_count"] == 0
+    assert tracker.inside == {} and tracker.last_fix == {}
+    assert tracker.pending_visits == [(FENCE["id"], "v1", t0, t0 + timedelta(minutes=3), 180.0)]
+
+def test_failed_flush_caps_pending_visits():
+    tracker = make_tracker()
+    t0 = datetime(2024, 1, 1, 10, 0)
+    tracker.pending_visits = [(FENCE["id"], f"v{i}", t0, t0, 0.0) for i in range(MAX_PENDING_VISITS + 5)]
+    with patch("app.geofence_analytics.get_ingest_pool", AsyncMock(side_effect=ConnectionError("db down"))):
+        asyncio.run(tracker.flush())
+    assert len(tracker.pending_visits) == MAX_PENDING_VISITS
+    assert tracker.pending_visits[-1][1] == f"v{MAX_PENDING_VISITS + 4}"
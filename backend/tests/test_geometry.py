@@ -0,0 +1,40 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from app import geodesy
+from app.geometry import GeofenceIndex, haversine_m, points_in_polygon, points_near_polyline
+
+SQUARE = np.array([[51.50, -0.12], [51.50, -0.10], [51.52, -0.10], [51.52, -0.12]])
+
+def test_points_in_polygon():
+    lats = np.array([51.51, 51.53, 51.505])
+    lngs = np.array([-0.11, -0.11, -0.13])
+    assert points_in_polygon(lats, lngs, SQUARE).tolist() == [True, False, False]
+
+def test_points_near_polyline():
+    line = np.array([[51.50, -0.12], [51.50, -0.10]])
+    # ~55m and ~555m north of the line
+    lats = np.array([51.5005, 51.505])
+    lngs = np.array([-0.11, -0.11])
+    assert points_near_polyline(lats, lngs, line, 100.0).tolist() == [True, False]
+
+def test_index_evaluates_mixed_shapes_in_one_pass():
+    index = GeofenceIndex({
+        "circle": {"shape": "circle", "center_lat": 51.51, "center_lng": -0.11, "radius_meters": 300.0},
+        "polygon": {"shape": "polygon", "coordinates": SQUARE.tolist()},
+        "corridor": {"shape": "corridor", "coordinates": [[51.60, -0.20], [51.60, -0.10]], "buffer_meters": 50.0},
+    })
+    matrix = index.evaluate([51.51, 51.519, 51.6002, 40.0], [-0.11, -0.119, -0.15, 0.0])
+    assert matrix.shape == (4, 3)
+    assert index.containing(51.51, -0.11) == {"circle", "polygon"}
+    assert index.containing(51.519, -0.119) == {"polygon"}
+    assert index.containing(51.6002, -0.15) == {"corridor"}
+    assert not matrix[3].any()
+
+def test_scalar_haversine_matches_array_form():
+    lats, lngs = np.array([51.5, 40.7]), np.array([-0.1, -74.0])
+    expected = haversine_m(lats, lngs, 48.85, 2.35)
+    assert [geodesy.haversine_m(lat, lng, 48.85, 2.35) for lat, lng in zip(lats, lngs)] == pytest.approx(expected)
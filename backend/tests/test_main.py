@@ -5,7 +5,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
-from datetime import datetime
+from datetime import datetime, timezone
 
 # --- Mock Data ---
 SAMPLE_VEHICLE = {
@@ -207,3 +207,204 @@ def test_delete_geofence_not_found(client, reset_mock):
     reset_mock.execute.return_value = "DELETE 0"
     response = client.delete("/geofences/123e4567-e89b-12d3-a456-426614174000")
     assert response.status_code == 404
+
+# -- System Router --
+
+def test_get_db_pool_stats(client, reset_mock):
+    response = client.get("/system/db-pool")
+    assert response.status_code == 200
+    data = response.json()
+    assert "query" in data
+    assert data["query"]["acquisitions"] >= 1  # init_db acquired a connection
+    assert "avg_wait_ms" in data["query"]
+
+def test_get_geofence_occupancy(client, reset_mock):
+    reset_mock.fetchrow.return_value = SAMPLE_GEOFENCE
+    client.post("/geofences", json={"name": "HQ", "center_lat": 40.7128, "center_lng": -74.0060, "radius_meters": 100})
+
+    response = client.get(f"/geofences/{SAMPLE_GEOFENCE['id']}/occupancy")
+    assert response.status_code == 200
+    assert response.json()["vehicle_count"] == 0
+
+    response = client.get("/geofences/occupancy")
+    assert response.status_code == 200
+    assert any(f["geofence_id"] == SAMPLE_GEOFENCE["id"] for f in response.json())
+
+def test_get_geofence_stats(client, reset_mock):
+    reset_mock.fetch.return_value = [
+        {"bucket": datetime.now(), "enters": 4, "exits": 2, "dwell_seconds": 300.0, "max_dwell": 200.0}
+    ]
+    response = client.get(f"/geofences/{SAMPLE_GEOFENCE['id']}/stats?hours=24")
+    assert response.status_code == 200
+    data = response.json()
+    assert data[0]["enters"] == 4
+    assert data[0]["avg_dwell_seconds"] == 150.0
+
+def test_create_polygon_geofence(client, reset_mock):
+    reset_mock.fetchrow.return_value = {
+        **SAMPLE_GEOFENCE, "id": "223e4567-e89b-12d3-a456-426614174000", "shape": "polygon",
+        "center_lat": None, "center_lng": None, "radius_meters": None,
+        "coordinates": [[51.50, -0.12], [51.50, -0.10], [51.52, -0.10]],
+    }
+    response = client.post("/geofences", json={
+        "name": "Depot", "shape": "polygon",
+        "coordinates": [[51.50, -0.12], [51.50, -0.10], [51.52, -0.10]]
+    })
+    assert response.status_code == 200
+    assert response.json()["shape"] == "polygon"
+    # Precomputed bounding box is stored alongside the shape
+    args = reset_mock.fetchrow.call_args[0]
+    assert args[8:12] == (51.50, -0.12, 51.52, -0.10)
+
+def test_create_polygon_geofence_requires_coordinates(client, reset_mock):
+    response = client.post("/geofences", json={"name": "Bad", "shape": "polygon", "coordinates": [[1.0, 2.0]]})
+    assert response.status_code == 422
+
+def test_get_vehicles_in_bbox(client, reset_mock):
+    client.redis_mock.get_vehicles_in_bbox = AsyncMock(return_value=[SAMPLE_VEHICLE])
+    response = client.get("/vehicles/bbox?min_lat=40.0&min_lng=-75.0&max_lat=41.0&max_lng=-74.0&status=moving")
+    assert response.status_code == 200
+    assert response.json()[0]["vehicle_id"] == "vehicle-1"
+    client.redis_mock.get_vehicles_in_bbox.assert_awaited_with(40.0, -75.0, 41.0, -74.0, status="moving", limit=None)
+
+def test_get_vehicles_in_bbox_rejects_inverted_bounds(client, reset_mock):
+    response = client.get("/vehicles/bbox?min_lat=41.0&min_lng=-75.0&max_lat=40.0&max_lng=-74.0")
+    assert response.status_code == 400
+
+def test_get_nearest_vehicles(client, reset_mock):
+    client.redis_mock.get_nearest_vehicles = AsyncMock(return_value=[{**SAMPLE_VEHICLE, "distance_km": 1.25}])
+    response = client.get("/vehicles/nearest?lat=40.7&lng=-74.0&k=5")
+    assert response.status_code == 200
+    data = response.json()
+    assert data[0]["distance_km"] == 1.25
+
+def test_vehicle_queries_reject_unknown_status(client, reset_mock):
+    assert client.get("/vehicles/nearest?lat=40.7&lng=-74.0&status=movng").status_code == 422
+    assert client.get("/vehicles/bbox?min_lat=40&min_lng=-75&max_lat=41&max_lng=-74&status=").status_code == 422
+
+# -- Alerts Router --
+
+def test_get_alerts(client, reset_mock):
+    reset_mock.fetch.return_value = [{
+        "id": "323e4567-e89b-12d3-a456-426614174000", "timestamp": datetime.now(), "vehicle_id": "truck-1",
+        "type": "speeding", "severity": "warning", "message": "Speed 150 km/h", "value": 150.0
+    }]
+    response = client.get("/alerts?limit=10")
+    assert response.status_code == 200
+    assert response.json()[0]["type"] == "speeding"
+
+def test_get_active_alerts(client, reset_mock):
+    response = client.get("/alerts/active")
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+
+# -- Trips Router --
+
+SAMPLE_TRIP = {
+    "id": "423e4567-e89b-12d3-a456-426614174000", "vehicle_id": "truck-1",
+    "start_time": datetime.now(), "end_time": datetime.now(), "distance_km": 12.5,
+}
+
+def test_get_vehicle_trips(client, reset_mock):
+    reset_mock.fetch.return_value = [SAMPLE_TRIP]
+    response = client.get("/vehicles/truck-1/trips?limit=5")
+    assert response.status_code == 200
+    assert response.json()[0]["distance_km"] == 12.5
+    assert reset_mock.fetch.call_args[0][1:] == ("truck-1", None, None, 5)
+
+def backfill(client, reset_mock, offsets, **params):
+    tx = MagicMock()
+    tx.__aenter__ = AsyncMock(return_value=None)
+    tx.__aexit__ = AsyncMock(return_value=None)
+    reset_mock.transaction = MagicMock(return_value=tx)
+    reset_mock.fetch.return_value = [{"vehicle_id": "truck-1"}]
+    # A steady drive, one fix a minute, 2024-01-01 12:00 UTC + offsets
+    reset_mock.fetchrow.return_value = {
+        "ts": [1704110400.0 + t for t in offsets],
+        "latitude": [51.5 + i * 0.005 for i in range(len(offsets))],
+        "longitude": [-0.1] * len(offsets),
+        "speed": [40.0] * len(offsets),
+        "fuel_level": [80.0 - i for i in range(len(offsets))],
+        "status": ["moving"] * len(offsets),
+    }
+    return client.post("/trips/backfill", params={
+        "start_time": "2024-01-01T00:00:00+00:00", "end_time": "2024-01-02T00:00:00+00:00", **params
+    })
+
+def test_backfill_trips(client, reset_mock):
+    response = backfill(client, reset_mock, [i * 60 for i in range(5)])
+    assert response.status_code == 200
+    assert response.json() == {"vehicles": 1, "trips": 1}
+    assert reset_mock.executemany.await_count == 1
+    # Telemetry is read with a margin around the window
+    _, vid, lo, hi = reset_mock.fetchrow.call_args[0]
+    assert vid == "truck-1" and lo < datetime(2024, 1, 1, tzinfo=timezone.utc) and hi > datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+def test_backfill_skips_trips_crossing_the_window(client, reset_mock):
+    # Drive from 11:57 on Jan 1 until past midnight: crosses the window end
+    response = backfill(client, reset_mock, [i * 60 for i in range(-3, 12 * 60 + 5)])
+    assert response.json() == {"vehicles": 1, "trips": 0}
+    assert reset_mock.executemany.await_count == 0
+
+def test_backfill_window_is_capped(client, reset_mock):
+    response = client.post("/trips/backfill", params={
+        "start_time": "2024-01-01T00:00:00+00:00", "end_time": "2024-03-01T00:00:00+00:00"
+    })
+    assert response.status_code == 400
+
+def test_get_batch_history(client, reset_mock):
+    now = datetime.now()
+    reset_mock.fetch.return_value = [
+        {**SAMPLE_VEHICLE, "vehicle_id": "v1", "time": now},
+        {**SAMPLE_VEHICLE, "vehicle_id": "v1", "time": now},
+        {**SAMPLE_VEHICLE, "vehicle_id": "v2", "time": now},
+    ]
+    response = client.post("/history/batch", json={
+        "vehicle_ids": ["v1", "v2"],
+        "start_time": "2024-01-01T00:00:00+00:00",
+        "end_time": "2024-01-01T01:00:00+00:00",
+        "step_seconds": 30
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["vehicles"]["v1"]["time"]) == 2
+    assert data["vehicles"]["v2"]["latitude"] == [SAMPLE_VEHICLE["latitude"]]
+    # Single query over all requested vehicles
+    assert reset_mock.fetch.await_count == 1
+    assert reset_mock.fetch.call_args[0][1] == ["v1", "v2"]
+
+def test_get_batch_history_requires_one_selector(client, reset_mock):
+    response = client.post("/history/batch", json={
+        "vehicle_ids": ["v1"], "bbox": [51.0, -1.0, 52.0, 0.0],
+        "start_time": "2024-01-01T00:00:00+00:00", "end_time": "2024-01-01T01:00:00+00:00"
+    })
+    assert response.status_code == 422
+
+def test_get_fleet_analytics(client, reset_mock):
+    from app.fleet_snapshot import fleet_snapshot
+    fleet_snapshot.update("fleet-test", {**SAMPLE_VEHICLE, "fuel_level": 5.0})
+    try:
+        response = client.get("/analytics/fleet/histogram?metric=speed&bins=5")
+        assert response.status_code == 200
+        assert sum(response.json()["counts"]) == fleet_snapshot.size
+        response = client.get("/analytics/fleet/low-fuel?threshold=10")
+        assert [v["vehicle_id"] for v in response.json()] == ["fleet-test"]
+        assert client.get("/analytics/fleet/heatmap?min_lat=1").status_code == 400
+        assert client.get("/analytics/fleet/heatmap?status=typo").status_code == 422
+        assert client.get("/analytics/fleet/percentiles?metric=typo").status_code == 422
+        assert client.get("/analytics/fleet/heatmap?status=moving").status_code == 200
+    finally:
+        fleet_snapshot.remove(["fleet-test"])
+
+def test_get_batch_history_for_geofence_without_stored_bbox(client, reset_mock):
+    # Fence created before bounding boxes were stored: the box is derived from the circle
+    reset_mock.fetchrow.return_value = {**SAMPLE_GEOFENCE, "shape": "circle", "min_lat": None,
+                                        "min_lng": None, "max_lat": None, "max_lng": None}
+    response = client.post("/history/batch", json={
+        "geofence_id": SAMPLE_GEOFENCE["id"],
+        "start_time": "2024-01-01T00:00:00+00:00", "end_time": "2024-01-01T01:00:00+00:00"
+    })
+    assert response.status_code == 200
+    min_lat, min_lng, max_lat, max_lng = reset_mock.fetch.call_args_list[0][0][3:7]
+    assert min_lat < SAMPLE_GEOFENCE["center_lat"] < max_lat
+    assert min_lng < SAMPLE_GEOFENCE["center_lng"] < max_lng
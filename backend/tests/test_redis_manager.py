@@ -0,0 +1,87 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import patch
+import fakeredis
+from app.config import Config
+
+def fix(vehicle_id, age_s, status="moving"):
+    return vehicle_id, {
+        "vehicle_id": vehicle_id, "latitude": 51.5, "longitude": -0.1, "speed": 30.0, "status": status,
+        "timestamp": datetime.fromtimestamp(time.time() - age_s, tz=timezone.utc),
+    }
+
+def make_manager():
+    # Imported here: test_main patches the module-level instance while importing main
+    from app.redis_manager import RedisManager
+
+    manager = RedisManager()
+    manager.redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    return manager
+
+async def seed(manager, fixes):
+    for vehicle_id, data in fixes:
+        await manager.update_vehicle_state(vehicle_id, data)
+
+def test_sweep_marks_silent_vehicles_offline_once_and_prunes_expired():
+    from app.redis_manager import geo_key
+
+    async def scenario():
+        manager = make_manager()
+        r = manager.redis
+        await seed(manager, [
+            fix("silent", Config.VEHICLE_OFFLINE_AFTER + 5),
+            fix("live", 1),
+            fix("expired", Config.VEHICLE_TTL + 5),
+        ])
+
+        offline, expired = await manager.sweep_stale_vehicles()
+        assert offline == ["silent"] and expired == ["expired"]
+        assert await r.hget("vehicle:silent", "status") == "offline"
+        assert await r.zscore(geo_key("offline"), "silent") is not None
+        assert await r.zscore(geo_key("moving"), "silent") is None
+        assert await r.hget("vehicle:live", "status") == "moving"
+
+        assert not await r.exists("vehicle:expired")
+        assert not await r.sismember("vehicles:active", "expired")
+        assert await r.zscore(geo_key(), "expired") is None
+        assert await r.zscore(geo_key("moving"), "expired") is None
+        assert await r.zscore("vehicles:last_seen", "expired") is None
+
+        # Already-marked vehicles are not reported again
+        assert await manager.sweep_stale_vehicles() == ([], [])
+
+    asyncio.run(scenario())
+
+def test_sweep_prunes_expired_vehicles_in_chunks():
+    async def scenario():
+        manager = make_manager()
+        await seed(manager, [fix(f"old{i}", Config.VEHICLE_TTL + 5 + i) for i in range(5)] + [fix("live", 1)])
+        with patch("app.redis_manager.SWEEP_CHUNK", 2):
+            _, expired = await manager.sweep_stale_vehicles()
+        assert sorted(expired) == [f"old{i}" for i in range(5)]
+        assert await manager.redis.smembers("vehicles:active") == {"live"}
+        assert await manager.redis.zcard("vehicles:last_seen") == 1
+
+    asyncio.run(scenario())
+
+def test_unknown_statuses_share_the_unknown_geo_set():
+    from app.redis_manager import geo_key
+
+    async def scenario():
+        manager = make_manager()
+        r = manager.redis
+        await seed(manager, [fix("v1", 10, status="maintenance")])
+        assert await r.zscore(geo_key("unknown"), "v1") is not None
+        assert not await r.exists(geo_key("maintenance"))
+        assert await r.hget("vehicle:v1", "status") == "maintenance"
+
+        await seed(manager, [fix("v1", 5, status="moving")])
+        assert await r.zscore(geo_key("unknown"), "v1") is None
+        assert await r.zscore(geo_key("moving"), "v1") is not None
+
+    asyncio.run(scenario())
@@ -0,0 +1,91 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from datetime import datetime, timezone, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.spool import TelemetrySpool, decode_records, encode_record
+
+T0 = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+def telemetry(vehicle_id, offset_s, **overrides):
+    payload = {
+        "vehicle_id": vehicle_id, "latitude": 51.5, "longitude": -0.1, "speed": 42.0,
+        "fuel_level": 70.0, "engine_temp": None, "heading": 90.0, "status": "moving",
+        "timestamp": T0 + timedelta(seconds=offset_s),
+    }
+    payload.update(overrides)
+    return payload
+
+def mock_pool():
+    conn = AsyncMock()
+    cm = MagicMock()
+    cm.__aenter__ = AsyncMock(return_value=conn)
+    cm.__aexit__ = AsyncMock(return_value=None)
+    pool = MagicMock()
+    pool.acquire.return_value = cm
+    return pool, conn
+
+def test_record_round_trip():
+    buf = encode_record(telemetry("v1", 0)) + encode_record(telemetry("v2", 1, status=None))
+    records = [record for _, record in decode_records(buf)]
+    assert records[0] == (T0, "v1", 51.5, -0.1, 42.0, 70.0, None, 90.0, "moving")
+    assert records[1][1] == "v2" and records[1][8] is None
+
+def test_segments_roll_over_and_replay_in_order(tmp_path):
+    record_size = len(encode_record(telemetry("v1", 0)))
+    spool = TelemetrySpool(str(tmp_path), segment_bytes=record_size * 3)
+    for i in range(7):
+        spool.append(telemetry(f"v{i % 2}", i))
+    assert len(spool.sealed_segments()) == 3
+
+    pool, conn = mock_pool()
+    with patch("app.spool.get_ingest_pool", AsyncMock(return_value=pool)):
+        asyncio.run(spool.replay())
+
+    copied = [r for call in conn.copy_records_to_table.call_args_list for r in call.kwargs["records"]]
+    assert [r[0] for r in copied] == [T0 + timedelta(seconds=i) for i in range(7)]
+    assert spool.replayed == 7
+    assert os.listdir(tmp_path) == []
+
+def test_failed_replay_keeps_segment(tmp_path):
+    spool = TelemetrySpool(str(tmp_path))
+    spool.append(telemetry("v1", 0))
+    pool, conn = mock_pool()
+    conn.copy_records_to_table.side_effect = ConnectionError("db down")
+    with patch("app.spool.get_ingest_pool", AsyncMock(return_value=pool)):
+        asyncio.run(spool.replay())
+    assert spool.replayed == 0
+    assert len(spool.sealed_segments()) == 1
+
+def persist_with(error):
+    from app import mqtt_service
+
+    spool, unhealthy = MagicMock(), MagicMock()
+    with patch.object(mqtt_service, "save_telemetry", AsyncMock(side_effect=error)), \
+         patch.object(mqtt_service, "ingest_healthy", return_value=True), \
+         patch.object(mqtt_service, "mark_ingest_unhealthy", unhealthy), \
+         patch.object(mqtt_service, "telemetry_spool", spool):
+        asyncio.run(mqtt_service.persist_telemetry(telemetry("v1", 0)))
+    return spool.append.call_count, unhealthy.call_count
+
+def test_connection_errors_spool_and_mark_pool_unhealthy():
+    assert persist_with(ConnectionRefusedError("db down")) == (1, 1)
+    assert persist_with(asyncio.TimeoutError()) == (1, 1)
+
+def test_rejected_rows_do_not_mark_pool_unhealthy():
+    assert persist_with(ValueError("invalid input")) == (0, 0)
+
+def test_malformed_messages_are_dropped_before_ingest():
+    from app import mqtt_service
+
+    msg = MagicMock(topic="fleet/v1/telemetry", payload=b'{"vehicle_id": "v1", "latitude": 51.5, "longitude": -0.1}')
+    with patch.object(mqtt_service, "loop", MagicMock()), \
+         patch("app.mqtt_service.asyncio.run_coroutine_threadsafe") as schedule:
+        mqtt_service.on_message(None, None, msg)
+        assert schedule.call_count == 0
+        msg.payload = b'{"vehicle_id": "v1", "latitude": 51.5, "longitude": -0.1, "speed": 3, "timestamp": "2024-01-01T12:00:00"}'
+        mqtt_service.on_message(None, None, msg)
+        assert schedule.call_count == 1
+        schedule.call_args[0][0].close()
@@ -0,0 +1,54 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timezone
+from app.trips import TripSegmenter, segment_trips
+
+T0 = 1_704_110_400.0  # 2024-01-01 12:00 UTC
+
+# (seconds, lat, lng, speed, fuel, status): a drive, a 10 minute stop, a second drive
+ROWS = [
+    (0, 51.500, -0.100, 0.0, 80.0, "idle"),
+    (10, 51.500, -0.100, 30.0, 80.0, "moving"),
+    (70, 51.505, -0.100, 40.0, 79.5, "moving"),
+    (130, 51.510, -0.100, 2.0, 79.4, "idle"),
+    (160, 51.510, -0.100, 35.0, 79.4, "moving"),
+    (220, 51.515, -0.100, 0.0, 79.0, "idle"),
+    (820, 51.515, -0.100, 0.0, 79.0, "idle"),
+    (830, 51.515, -0.100, 20.0, 79.0, "moving"),
+    (900, 51.520, -0.100, 25.0, 78.5, "moving"),
+]
+
+def stream(rows):
+    segmenter = TripSegmenter()
+    for t, lat, lng, speed, fuel, status in rows:
+        segmenter.process({
+            "vehicle_id": "v1", "timestamp": datetime.fromtimestamp(T0 + t, tz=timezone.utc),
+            "latitude": lat, "longitude": lng, "speed": speed, "fuel_level": fuel, "status": status,
+        })
+    segmenter.forget("v1")
+    return segmenter.pending
+
+def batch(rows):
+    t, lat, lng, speed, fuel, status = zip(*rows)
+    return segment_trips("v1", [T0 + x for x in t], lat, lng, speed, fuel, status)
+
+def test_stream_splits_trips_at_stops():
+    trips = stream(ROWS)
+    assert len(trips) == 2
+    first = trips[0]
+    assert first["duration_seconds"] == 150.0  # first moving fix to last moving fix
+    assert first["idle_seconds"] == 60.0  # the short halt at t=130 does not end the trip
+    assert first["fuel_used"] == 0.6
+    assert 1.0 < first["distance_km"] < 1.2
+    assert first["max_speed"] == 40.0
+
+def test_batch_matches_stream():
+    assert batch(ROWS) == stream(ROWS)
+
+def test_gap_ends_trip():
+    rows = [(0, 51.50, -0.1, 30.0, 80.0, "moving"), (60, 51.51, -0.1, 30.0, 80.0, "moving"),
+            (2000, 51.52, -0.1, 30.0, 80.0, "moving"), (2060, 51.53, -0.1, 30.0, 80.0, "moving")]
+    assert len(stream(rows)) == 2
+    assert batch(rows) == stream(rows)
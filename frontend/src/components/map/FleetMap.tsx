@@ -25,6 +25,12 @@ const statusColors = {
   offline: '#6B7280',
 };
 
+// Stroke width in pixels covering `bufferMeters` on each side of a line at `lat`
+function corridorWeight(map: L.Map, lat: number, bufferMeters: number) {
+  const metersPerPixel = (40075016.686 * Math.cos((lat * Math.PI) / 180)) / Math.pow(2, map.getZoom() + 8);
+  return Math.max((2 * bufferMeters) / metersPerPixel, 2);
+}
+
 export function FleetMap({
   vehicles,
   geofences = [],
@@ -152,20 +158,53 @@ export function FleetMap({
 
   // Update geofences
   useEffect(() => {
-    if (!geofencesRef.current || !showGeofences) return;
-    geofencesRef.current.clearLayers();
-
-    geofences.forEach((geofence) => {
-      L.circle([geofence.center_lat, geofence.center_lng], {
-        radius: geofence.radius_meters,
-        color: geofence.color,
-        fillColor: geofence.color,
-        fillOpacity: 0.1,
-        weight: 2,
-      })
-        .addTo(geofencesRef.current!)
-        .bindTooltip(geofence.name, { permanent: false });
-    });
+    const map = mapRef.current;
+    if (!map || !geofencesRef.current || !showGeofences) return;
+
+    const drawGeofences = () => {
+      geofencesRef.current!.clearLayers();
+
+      geofences.forEach((geofence) => {
+        const style = {
+          color: geofence.color,
+          fillColor: geofence.color,
+          fillOpacity: 0.1,
+          weight: 2,
+        };
+        const coordinates = geofence.coordinates ?? [];
+        let layer: L.Layer | null = null;
+
+        if (geofence.shape === 'polygon' && coordinates.length >= 3) {
+          layer = L.polygon(coordinates, style);
+        } else if (geofence.shape === 'corridor' && coordinates.length >= 2) {
+          // Round caps and joins on a stroke as wide as the buffer draw the
+          // corridor outline; the width is recomputed on every zoom.
+          layer = L.polyline(coordinates, {
+            color: geofence.color,
+            opacity: 0.25,
+            weight: corridorWeight(map, coordinates[0][0], geofence.buffer_meters ?? 0),
+            lineCap: 'round',
+            lineJoin: 'round',
+          });
+          L.polyline(coordinates, { ...style, weight: 1, dashArray: '4, 4' }).addTo(geofencesRef.current!);
+        } else if (geofence.center_lat != null && geofence.center_lng != null && geofence.radius_meters != null) {
+          layer = L.circle([geofence.center_lat, geofence.center_lng], {
+            ...style,
+            radius: geofence.radius_meters,
+          });
+        }
+
+        layer?.addTo(geofencesRef.current!).bindTooltip(geofence.name, { permanent: false });
+      });
+    };
+
+    drawGeofences();
+    const hasCorridors = geofences.some((g) => g.shape === 'corridor');
+    if (hasCorridors) map.on('zoomend', drawGeofences);
+
+    return () => {
+      if (hasCorridors) map.off('zoomend', drawGeofences);
+    };
   }, [geofences, showGeofences]);
 
   // Handle Route Playback
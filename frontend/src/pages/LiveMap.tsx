@@ -209,7 +209,9 @@ export default function LiveMap() {
                   />
                   <span className="text-sm">{geo.name}</span>
                 </div>
-                <span className="text-xs text-muted-foreground">{geo.radius_meters}m</span>
+                <span className="text-xs text-muted-foreground">
+                  {geo.shape === 'polygon' || geo.shape === 'corridor' ? geo.shape : `${geo.radius_meters}m`}
+                </span>
               </div>
             ))}
           </div>
@@ -7,6 +7,7 @@ import { Switch } from '@/components/ui/switch';
 import { useAuthStore } from '@/store/authStore';
 import { useFleetStore } from '@/store/fleetStore';
 import { toast } from 'sonner';
+import { Geofence } from '@/types/fleet';
 import { useEffect } from 'react';
 
 export default function Settings() {
@@ -227,13 +228,26 @@ function NotificationSettings() {
   );
 }
 
-interface GeofenceDisplay {
-  id: string;
-  name: string;
-  center_lat: number;
-  center_lng: number;
-  radius_meters: number;
-  color: string;
+type GeofenceDisplay = Pick<
+  Geofence,
+  'id' | 'name' | 'shape' | 'coordinates' | 'buffer_meters' | 'center_lat' | 'center_lng' | 'radius_meters' | 'color'
+>;
+
+function geofenceCenter(geo: GeofenceDisplay) {
+  if (geo.center_lat != null && geo.center_lng != null) {
+    return `${geo.center_lat.toFixed(4)}, ${geo.center_lng.toFixed(4)}`;
+  }
+  const points = geo.coordinates ?? [];
+  if (points.length === 0) return '—';
+  const lat = points.reduce((sum, p) => sum + p[0], 0) / points.length;
+  const lng = points.reduce((sum, p) => sum + p[1], 0) / points.length;
+  return `${lat.toFixed(4)}, ${lng.toFixed(4)}`;
+}
+
+function geofenceSize(geo: GeofenceDisplay) {
+  if (geo.shape === 'polygon') return `${geo.coordinates?.length ?? 0} vertices`;
+  if (geo.shape === 'corridor') return `±${geo.buffer_meters ?? 0}m`;
+  return geo.radius_meters != null ? `${geo.radius_meters}m` : '—';
 }
 
 function GeofenceSettings({ geofences, onDelete }: { geofences: GeofenceDisplay[]; onDelete: (id: string) => void }) {
@@ -253,7 +267,7 @@ function GeofenceSettings({ geofences, onDelete }: { geofences: GeofenceDisplay[
             <tr className="bg-glass">
               <th>Name</th>
               <th>Center</th>
-              <th>Radius</th>
+              <th>Size</th>
               <th>Color</th>
               <th>Actions</th>
             </tr>
@@ -263,9 +277,9 @@ function GeofenceSettings({ geofences, onDelete }: { geofences: GeofenceDisplay[
               <tr key={geo.id}>
                 <td className="font-medium">{geo.name}</td>
                 <td className="font-mono text-sm text-muted-foreground">
-                  {geo.center_lat.toFixed(4)}, {geo.center_lng.toFixed(4)}
+                  {geofenceCenter(geo)}
                 </td>
-                <td>{geo.radius_meters}m</td>
+                <td>{geofenceSize(geo)}</td>
                 <td>
                   <div className="flex items-center gap-2">
                     <div
@@ -11,6 +11,28 @@ export interface RoutePoint {
     status: string;
 }
 
+export interface BatchRouteColumns {
+    time: number[]; // epoch milliseconds
+    latitude: number[];
+    longitude: number[];
+    speed: number[];
+    fuel_level: (number | null)[];
+    status: (string | null)[];
+}
+
+export interface BatchRouteHistory {
+    start_time: string;
+    end_time: string;
+    step_seconds: number | null;
+    vehicles: Record<string, BatchRouteColumns>;
+}
+
+export interface BatchRouteSelection {
+    vehicleIds?: string[];
+    geofenceId?: string;
+    bbox?: [number, number, number, number];
+}
+
 export const HistoryService = {
     getRouteHistory: async (vehicleId: string, startTime: Date, endTime: Date): Promise<RoutePoint[]> => {
         const params = new URLSearchParams({
@@ -23,5 +45,29 @@ export const HistoryService = {
             throw new Error('Failed to fetch route history');
         }
         return res.json();
+    },
+
+    getBatchRouteHistory: async (
+        selection: BatchRouteSelection,
+        startTime: Date,
+        endTime: Date,
+        stepSeconds?: number
+    ): Promise<BatchRouteHistory> => {
+        const res = await fetch(`${API_BASE}/history/batch`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                vehicle_ids: selection.vehicleIds,
+                geofence_id: selection.geofenceId,
+                bbox: selection.bbox,
+                start_time: startTime.toISOString(),
+                end_time: endTime.toISOString(),
+                step_seconds: stepSeconds,
+            }),
+        });
+        if (!res.ok) {
+            throw new Error('Failed to fetch batch route history');
+        }
+        return res.json();
     }
 };
@@ -39,9 +39,14 @@ export interface TelemetryPoint {
 export interface Geofence {
   id: string;
   name: string;
-  center_lat: number;
-  center_lng: number;
-  radius_meters: number;
+  shape?: 'circle' | 'polygon' | 'corridor';
+  // Polygon vertices or corridor centreline as [lat, lng] pairs
+  coordinates?: [number, number][] | null;
+  buffer_meters?: number | null;
+  // Circle fences only; null for polygons and corridors
+  center_lat?: number | null;
+  center_lng?: number | null;
+  radius_meters?: number | null;
   color: string;
   created_at: string;
 }